@@ -9,13 +9,21 @@ from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
-import nltk
-from nltk.corpus import stopwords
-import spacy
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from gensim import corpora, models, summarization
-from fpdf import FPDF
+
+from utils.http_cache import HttpCache, cached_get
+from utils.lazy import ensure_nltk, lazy
+from utils.streaming import threaded
+from utils.summarize import Summarizer
+from utils.text_pipeline import EntityIndex, NlpWorkers, analyze, load_pipeline, usable_processes
+from utils.topic_model import TopicModel
+from utils.url_store import PriorityFrontier
+from utils.word_freq import WordFreqStore, text_digest
+
+# Heavy libraries load when their stage first uses them, so the crawl starts at once
+nltk_corpus = lazy("nltk.corpus")
+wordcloud_lib = lazy("wordcloud")
+plt = lazy("matplotlib.pyplot")
+fpdf = lazy("fpdf")
 
 # ----------------------------- SETTINGS -----------------------------
 START_URL = "https://en.wikipedia.org/wiki/Machine_learning"
@@ -24,24 +32,42 @@ MAX_DEPTH = 2
 OUTPUT_DIR = "wiki_articles"
 SUMMARY_DIR = "wiki_summaries"
 WORD_FREQ_CSV = "word_frequency.csv"
+WORD_FREQ_DB = "word_frequency.sqlite"  # per-article counts, kept and extended across runs
+WORD_FREQ_TOP = 1000         # most frequent words written to WORD_FREQ_CSV
+WORDCLOUD_WORDS = 200
 PDF_FILE = "wiki_mini_encyclopedia_toc.pdf"
 DELAY = 1.0
 JITTER = 0.5
 TOPIC_COUNT = 5
+TOPIC_DIR = "wiki_topics"    # dictionary, LDA model and training trace, kept across runs
+TOPIC_WORKERS = 1            # > 1: train with LdaMulticore on this many processes
+TOPIC_PASSES = 10            # passes when training a new model
+TOPIC_UPDATE_PASSES = 1      # passes over new articles when updating a saved one
 SUMMARY_RATIO = 0.2
+SUMMARY_PROCESSES = -1       # TextRank worker processes (-1: one per core)
+SUMMARY_CACHE = "summary_cache.sqlite"  # summaries by article text hash (None to disable)
+CACHE_DIR = "http_cache"     # conditional-GET cache shared across runs (None to disable)
+CACHE_MB = 512
+FRONTIER = "best"            # "best": most linked-to, on-topic pages first; "bfs": breadth-first
+TOPIC_WEIGHT = 5.0           # score of a title with every start-topic word, in in-links
+FRONTIER_CAP = 100 * LIMIT   # best-first: most queued candidates; links to queued ones still count
+QUEUE_SIZE = 8               # pages buffered between pipeline stages
+NLP_MODEL = "en_core_web_sm"
+NLP_PROCESSES = 1            # > 1: spaCy worker processes, forked before the crawl starts (-1: one per core)
+NLP_BATCH = 4                # articles per spaCy batch; small, so pages reach the next stage during the crawl
+ENTITY_INDEX = "wiki_entities.json"  # named entity -> articles mentioning it
 # --------------------------------------------------------------------
 
 # -------------------------- SETUP --------------------------
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(SUMMARY_DIR, exist_ok=True)
 visited = set()
-queue = deque([(START_URL, 0)])
-
-# Download NLP resources
-nltk.download('punkt')
-nltk.download('stopwords')
-stop_words = set(stopwords.words('english'))
-nlp = spacy.load("en_core_web_sm")
+if FRONTIER == "best":
+    queue = PriorityFrontier(START_URL, TOPIC_WEIGHT)
+    queue.append(START_URL, 0)
+else:
+    queue = deque([(START_URL, 0)])
+http_cache = HttpCache(CACHE_DIR, max_bytes=CACHE_MB * 1024 * 1024) if CACHE_DIR else None
 
 # ----------------------- CRAWLING -----------------------
 def clean_text(text):
@@ -52,8 +78,9 @@ def clean_text(text):
 def scrape_page(url):
     try:
         time.sleep(DELAY + random.random() * JITTER)
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
+        r = cached_get(requests, url, http_cache, timeout=10)
+        if r.status_code != 200:
+            raise requests.HTTPError(f"HTTP {r.status_code}")
         soup = BeautifulSoup(r.text, "html.parser")
         content = soup.find("div", class_="mw-parser-output")
         if not content:
@@ -79,86 +106,144 @@ def save_article(title, body):
         f.write(body)
     return filename, len(body.split())
 
-# BFS Crawl
-all_texts = {}
-documents = []
-count = 0
-while queue and count < LIMIT:
-    url, depth = queue.popleft()
-    if url in visited or depth > MAX_DEPTH:
-        continue
-
-    article, links = scrape_page(url)
-    if article:
-        title, body = article
-        filename, word_count = save_article(title, body)
-        all_texts[filename] = body
-        tokens = [w for w in nltk.word_tokenize(re.sub(r'[^a-z\s]', '', body.lower())) if w not in stop_words and len(w)>2]
-        documents.append(tokens)
-        visited.add(url)
-        count += 1
-        print(f"[{count}/{LIMIT}] Saved: {title}")
-
-        if depth < MAX_DEPTH:
-            for link in links:
-                if link not in visited and len(visited) + len(queue) < LIMIT:
-                    queue.append((link, depth + 1))
-
-print(f"\n✅ Crawled {count} articles into '{OUTPUT_DIR}'")
+def crawl_pages():
+    """Crawl (BFS or best-first, see FRONTIER) and yield ``(filename, title, body)`` per saved article."""
+    count = 0
+    while queue and count < LIMIT:
+        url, depth = queue.popleft()
+        if url in visited or depth > MAX_DEPTH:
+            continue
+        visited.add(url)  # tried once, whether or not the scrape succeeds
+
+        article, links = scrape_page(url)
+        if article:
+            title, body = article
+            filename, word_count = save_article(title, body)
+            count += 1
+            print(f"[{count}/{LIMIT}] Saved: {title}")
+
+            if depth < MAX_DEPTH:
+                for link in dict.fromkeys(links):
+                    if FRONTIER == "best":
+                        # Candidates stay queued (up to FRONTIER_CAP); the best LIMIT of them get fetched
+                        if link in visited:
+                            continue
+                        if len(queue) < FRONTIER_CAP:
+                            queue.append(link, depth + 1)
+                        else:
+                            queue.add_link(link, depth + 1)
+                    elif link not in visited and count + len(queue) < LIMIT:
+                        queue.append((link, depth + 1))
+            yield filename, title, body
+
+    print(f"\n✅ Crawled {count} articles into '{OUTPUT_DIR}'")
+    if http_cache:
+        print(f"   cache: {http_cache.hits} not-modified, {http_cache.misses} downloaded")
+        http_cache.close()
+
+# ---------------------- STREAMING STAGES ----------------------
+# crawl -> tokenise + NER -> count + summarise, each on its own thread with at
+# most QUEUE_SIZE pages in between, so the NLP stages keep up with the crawl
+# and no stage holds more than a few pages. Tokenising, stopword filtering
+# and NER are one batched spaCy pass, on the NLP thread or NLP_PROCESSES
+# workers; summaries come from SUMMARY_CACHE or SUMMARY_PROCESSES TextRank
+# workers. Both worker pools are created when the stream starts, before any
+# of its threads do, since forking is only safe while this is the one thread.
+# Articles the saved topic model has not seen are queued in TOPIC_DIR on disk,
+# and LDA streams them back from there.
+
+def tokenize(pages):
+    ensure_nltk("stopwords")
+    stop_words = set(nltk_corpus.stopwords.words('english'))
+    # Tokenizer + NER; parser, tagger and lemmatizer off. Workers load their own copy.
+    nlp = load_pipeline(NLP_MODEL) if nlp_workers is None else None
+    items = ((body, (filename, title, body)) for filename, title, body in pages)
+    for (filename, title, body), tokens, entities in analyze(
+            nlp, items, stop_words, batch_size=NLP_BATCH, workers=nlp_workers):
+        yield filename, title, body, tokens, entities
+
+def print_entities(entities):
+    print("\n🔹 Sample Named Entities from first document:")
+    for text, label in entities[:20]:
+        print(text, label)
+
+def summarize_article(filename, text):
+    lead = text[:500] + "..."
+
+    def save(filename, summary):
+        if not summary.strip():
+            summary = lead
+        with open(os.path.join(SUMMARY_DIR, filename), 'w', encoding='utf-8') as f:
+            f.write(summary)
+        print(f"Saved summary: {filename}")
+
+    summarizer.submit(filename, text, save)
+
+def start_workers(stream):
+    """Create the worker pools when ``stream`` is first pulled, before its threads start."""
+    global nlp_workers, summarizer
+    nlp_processes = usable_processes(NLP_PROCESSES)
+    nlp_workers = NlpWorkers(NLP_MODEL, nlp_processes) if nlp_processes > 1 else None
+    summarizer = Summarizer(SUMMARY_CACHE, SUMMARY_RATIO, usable_processes(SUMMARY_PROCESSES))
+    yield from stream
+
+nlp_workers = summarizer = None
+word_freq = WordFreqStore(WORD_FREQ_DB)
+topics = TopicModel(TOPIC_DIR, TOPIC_COUNT, workers=TOPIC_WORKERS,
+                    passes=TOPIC_PASSES, update_passes=TOPIC_UPDATE_PASSES)
+entity_index = EntityIndex()
+pages = threaded(crawl_pages(), QUEUE_SIZE, name="crawl")
+stream = start_workers(threaded(tokenize(pages), QUEUE_SIZE, name="nlp"))
+for filename, title, body, tokens, entities in stream:
+    digest = text_digest(body)
+    if not word_freq.unchanged(filename, digest):  # counted by an earlier run
+        word_freq.add(filename, Counter(tokens), digest)
+        word_freq.commit()
+    if topics.is_new(filename, digest):
+        topics.add(filename, digest, tokens)
+    entity_index.add(filename, entities)
+    if len(entity_index.documents) == 1:
+        print_entities(entities)
+    summarize_article(filename, body)
+if nlp_workers:
+    nlp_workers.close()
+summarizer.close()
+print(f"✅ Summaries: {summarizer.hits} from cache, {summarizer.misses} computed")
+entity_index.save(ENTITY_INDEX)
+print(f"✅ {len(entity_index.postings)} named entities indexed in '{ENTITY_INDEX}'")
 
 # ---------------------- WORD FREQUENCY ----------------------
-all_tokens = [token for doc in documents for token in doc]
-word_freq = Counter(all_tokens)
 with open(WORD_FREQ_CSV, 'w', newline='', encoding='utf-8') as f:
     writer = csv.writer(f)
     writer.writerow(["Word", "Frequency"])
-    for word, freq in word_freq.most_common():
+    for word, freq in word_freq.top(WORD_FREQ_TOP):
         writer.writerow([word, freq])
-print(f"✅ Word frequencies saved to '{WORD_FREQ_CSV}'")
-
-# ---------------------- NAMED ENTITIES ----------------------
-print("\n🔹 Sample Named Entities from first document:")
-if documents:
-    sample_text = " ".join(documents[0])
-    doc_spacy = nlp(sample_text)
-    for ent in doc_spacy.ents[:20]:
-        print(ent.text, ent.label_)
+print(f"✅ Top {WORD_FREQ_TOP} of {len(word_freq)} words ({word_freq.documents()} articles) saved to '{WORD_FREQ_CSV}'")
 
 # ---------------------- WORD CLOUD ----------------------
-wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(word_freq)
+wordcloud = wordcloud_lib.WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(
+    dict(word_freq.top(WORDCLOUD_WORDS)))
+word_freq.close()
 plt.figure(figsize=(15, 7))
 plt.imshow(wordcloud, interpolation='bilinear')
 plt.axis("off")
 plt.show()
 
 # ---------------------- TOPIC MODELING ----------------------
-dictionary = corpora.Dictionary(documents)
-corpus = [dictionary.doc2bow(doc) for doc in documents]
-lda_model = models.LdaModel(corpus, num_topics=TOPIC_COUNT, id2word=dictionary, passes=10)
+print(f"\n🔹 Training topics on {len(topics.pending)} new articles ({len(topics.trained)} seen in all):")
+lda_model = topics.refresh()
+topics.close()
 topic_words = {}
 print("\n🔹 Topics detected:")
-for i, topic in lda_model.print_topics(num_words=8):
+for i, topic in (lda_model.print_topics(num_words=8) if lda_model else []):
     print(f"Topic {i+1}: {topic}")
     topic_words[i] = [w.split('*')[1].replace('"','') for w in topic.split('+')]
 
-# ---------------------- SUMMARIZATION ----------------------
-print("\n🔹 Generating summaries:")
-for filename, text in all_texts.items():
-    try:
-        summary = summarization.summarize(text, ratio=SUMMARY_RATIO)
-        if not summary.strip():
-            summary = text[:500] + "..."
-        with open(os.path.join(SUMMARY_DIR, filename), 'w', encoding='utf-8') as f:
-            f.write(summary)
-        print(f"Saved summary: {filename}")
-    except Exception as e:
-        print(f"Failed summarizing {filename}: {e}")
-
 # ---------------------- CREATE PDF WITH TOC ----------------------
 summary_files = sorted([f for f in os.listdir(SUMMARY_DIR) if f.endswith(".txt")])
 toc = []
 
-pdf = FPDF()
+pdf = fpdf.FPDF()
 pdf.set_auto_page_break(auto=True, margin=15)
 pdf.set_font("Arial", size=12)
 
@@ -0,0 +1 @@
+"""Offline benchmarks for the crawler and NLP scripts (run with ``python -m benchmarks.<name>``)."""
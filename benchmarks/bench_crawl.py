@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end crawl benchmark against the local Wikipedia stand-in.
+
+Starts utils.wiki_standin with the requested latency, page size and 429/5xx
+error rate, then runs ``wiki scrapper.py`` once per cell of the
+workers x limit x depth (x engine) matrix, each in its own process. Per run
+it records pages/s, p50/p99 fetch latency, CPU seconds and peak RSS, and
+appends one JSON line per run to the results file, tagged with the git
+revision so runs of different versions can be compared:
+
+    python -m benchmarks.bench_crawl --workers 1 4 16 --limit 200 1000 --depth 2 3
+    python -m benchmarks.bench_crawl --latency 0.05 --error-rate 0.02 --label slow-server
+    python -m benchmarks.bench_crawl --compare benchmarks/results/crawl.jsonl --label after
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.wiki_standin import serve
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPER = os.path.join(REPO, "wiki scrapper.py")
+DEFAULT_RESULTS = os.path.join(REPO, "benchmarks", "results", "crawl.jsonl")
+KEY = ("engine", "workers", "limit", "depth")
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def run_crawl(base_url: str, out_dir: str, engine: str, workers: int, limit: int, depth: int,
+              extra_args) -> dict:
+    """One crawl in a child process; returns its metrics plus CPU time and peak RSS."""
+    cmd = [sys.executable, SCRAPER, "--topic", "Topic 0", "--base-url", base_url, "--out", out_dir,
+           "--engine", engine, "--workers", str(workers), "--limit", str(limit),
+           "--depth", str(depth), "--delay", "0.01", "--jitter", "0", "--metrics",
+           *extra_args]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=REPO, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 gives this child's own rusage (RUSAGE_CHILDREN would be cumulative)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - t0
+    stderr = proc.stderr.read().decode("utf-8", "replace")
+    proc.stderr.close()
+    if proc.returncode != 0:
+        raise RuntimeError(f"crawl exited with {proc.returncode}:\n{stderr[-2000:]}")
+
+    with open(os.path.join(out_dir, "metrics.jsonl"), encoding="utf-8") as f:
+        final = json.loads(f.read().splitlines()[-1])
+    fetch = final["latency"]["fetch"]
+    return {
+        "pages": final["pages"],
+        "failed": final["failed"],
+        "pages_per_sec": final["pages_per_sec"],
+        "fetch_p50_ms": round(fetch["p50"] * 1000, 3),
+        "fetch_p99_ms": round(fetch["p99"] * 1000, 3),
+        "retries": sum(final["retries"].values()),
+        "bytes_downloaded": final["bytes_downloaded"],
+        "wall_s": round(wall, 3),
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is in KiB on Linux
+    }
+
+
+def load_results(path: str, label: str = None) -> dict:
+    """Latest result per matrix cell in ``path``, optionally only for one label."""
+    rows = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            if label is None or row.get("label") == label:
+                rows[tuple(row[k] for k in KEY)] = row
+    return rows
+
+
+def print_row(row: dict, baseline: dict = None):
+    cell = " ".join(f"{k}={row[k]}" for k in KEY)
+    line = (f"{cell:<42} {row['pages_per_sec']:>8.1f} pages/s  p50 {row['fetch_p50_ms']:>7.1f} ms"
+            f"  p99 {row['fetch_p99_ms']:>7.1f} ms  cpu {row['cpu_s']:>6.2f} s"
+            f"  rss {row['peak_rss_mb']:>6.1f} MB")
+    if baseline:
+        old = baseline.get(tuple(row[k] for k in KEY))
+        if old and old["pages_per_sec"]:
+            line += f"  ({row['pages_per_sec'] / old['pages_per_sec']:.2f}x {old.get('rev', '?')})"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--limit", type=int, nargs="+", default=[200])
+    parser.add_argument("--depth", type=int, nargs="+", default=[3])
+    parser.add_argument("--engine", nargs="+", default=["threads"], choices=["threads", "async"])
+    parser.add_argument("--pages", type=int, default=5000, help="Articles in the generated graph")
+    parser.add_argument("--paragraphs", type=int, default=6, help="Paragraphs per page (page size)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server latency per response (s)")
+    parser.add_argument("--latency-jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 429/503 responses")
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After sent with 429s")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSONL file results are appended to")
+    parser.add_argument("--label", default="", help="Free-form tag stored with every result")
+    parser.add_argument("--compare", default=None, metavar="RESULTS",
+                        help="Show the speed-up against the latest matching runs in this file")
+    parser.add_argument("--compare-label", default=None, help="Only compare against runs with this label")
+    parser.add_argument("scraper_args", nargs="*",
+                        help="Extra arguments for wiki scrapper.py, after --, e.g. -- --parser bs4")
+    args = parser.parse_args()
+
+    baseline = load_results(args.compare, args.compare_label) if args.compare else None
+    server = {"pages": args.pages, "paragraphs": args.paragraphs, "latency": args.latency,
+              "latency_jitter": args.latency_jitter, "error_rate": args.error_rate,
+              "retry_after": args.retry_after}
+    rev = git_revision()
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+
+    print(f"▶ rev {rev}, server {server}")
+    with serve(**server) as base_url, open(args.results, "a", encoding="utf-8") as results:
+        for engine, workers, limit, depth in itertools.product(
+                args.engine, args.workers, args.limit, args.depth):
+            with tempfile.TemporaryDirectory() as out_dir:
+                measured = run_crawl(base_url, out_dir, engine, workers, limit, depth, args.scraper_args)
+            row = {"ts": time.time(), "rev": rev, "label": args.label, "engine": engine,
+                   "workers": workers, "limit": limit, "depth": depth, "server": server,
+                   "scraper_args": args.scraper_args, **measured}
+            results.write(json.dumps(row) + "\n")
+            results.flush()
+            print_row(row, baseline)
+    print(f"📄 Results: {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Equivalence check and pages/second micro-benchmark for the article extractors.
+
+Every backend in utils.wiki_extract must reproduce the golden output in
+benchmarks/golden/ and agree with the bs4 reference on each generated page
+(and on any saved Wikipedia pages passed with --html). Then each backend
+is timed on the same pages.
+
+    python -m benchmarks.bench_extract --pages 200
+    python -m benchmarks.bench_extract --html saved/*.html
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from utils.wiki_extract import BACKENDS, extract_bs4
+from utils.wiki_standin import render_article
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def golden_cases():
+    for name in sorted(os.listdir(GOLDEN_DIR)):
+        if name.endswith(".html"):
+            base = os.path.join(GOLDEN_DIR, name[:-5])
+            with open(base + ".html", encoding="utf-8") as f:
+                html = f.read()
+            with open(base + ".json", encoding="utf-8") as f:
+                expected = json.load(f)
+            yield name, html, (expected["body"], expected["links"], expected["title"])
+
+
+def check(pages):
+    failures = 0
+    for backend, extract in BACKENDS.items():
+        for name, html, expected in golden_cases():
+            if tuple(extract(html)) != expected:
+                print(f"❌ {backend}: differs from golden {name}")
+                failures += 1
+        for i, html in enumerate(pages):
+            if tuple(extract(html)) != tuple(extract_bs4(html)):
+                print(f"❌ {backend}: differs from bs4 on page {i}")
+                failures += 1
+    return failures
+
+
+def bench(pages, repeat):
+    results = {}
+    for backend, extract in BACKENDS.items():
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for html in pages:
+                extract(html)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        results[backend] = len(pages) / best
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark the article extractors.")
+    parser.add_argument("--pages", type=int, default=200, help="Generated pages to time (default: 200)")
+    parser.add_argument("--html", nargs="*", default=[], help="Saved Wikipedia pages to include")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing rounds, best is kept (default: 3)")
+    args = parser.parse_args()
+
+    pages = [render_article(i, args.pages) for i in range(args.pages)]
+    for path in args.html:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+
+    failures = check(pages)
+    if failures:
+        sys.exit(f"{failures} equivalence failure(s)")
+    print(f"✅ {len(BACKENDS)} backends agree on the golden files and {len(pages)} page(s)")
+
+    results = bench(pages, args.repeat)
+    reference = results["bs4"]
+    for backend, pps in sorted(results.items(), key=lambda kv: -kv[1]):
+        print(f"   {backend:6s} {pps:10.1f} pages/s  ({pps / reference:.1f}x bs4)")
+
+
+if __name__ == "__main__":
+    main()
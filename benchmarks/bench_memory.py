@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bytes per discovered URL for the crawl frontier and seen set.
+
+Each synthetic URL is marked seen and queued, as it would be right after
+discovery. Compares the original layout (set of full URL strings plus a
+deque of ``(url, depth)`` tuples) with the compact stores in
+utils/url_store.py.
+
+    python -m benchmarks.bench_memory --urls 500000
+"""
+
+import argparse
+import gc
+import random
+import tempfile
+import tracemalloc
+from collections import deque
+
+from utils.url_store import BloomSeen, ExactSeen, PackedFrontier
+
+WIKI = "https://en.wikipedia.org/wiki/"
+WORDS = ("Machine learning neural network statistics theory history of the United States "
+         "list album river county village football club election season museum "
+         "university species film (disambiguation) Müller São Paulo").split()
+
+
+def synthetic_titles(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    seen = set()
+    while len(seen) < n:
+        title = "_".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 4)))
+        seen.add(f"{title}_{rnd.randrange(10 ** 6)}" if rnd.random() < 0.5 else title)
+    return [t.replace("ü", "%C3%BC").replace("ã", "%C3%A3") for t in seen]
+
+
+def original(titles):
+    seen, q = set(), deque()
+    for i, t in enumerate(titles):
+        url = WIKI + t
+        seen.add(url)
+        q.append((url, i % 4))
+    return seen, q
+
+
+def compact(titles, seen, spill_dir=None):
+    # When spilling, keep only two small chunks in memory to show the floor
+    q = PackedFrontier(chunk_entries=4096, mem_chunks=2, spill_dir=spill_dir) if spill_dir else PackedFrontier()
+    for i, t in enumerate(titles):
+        key = t.encode("utf-8")
+        seen.add(key)
+        q.append(key, i % 4)
+    return seen, q
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes per discovered URL.")
+    parser.add_argument("--urls", type=int, default=200_000, help="Distinct URLs (default: 200000)")
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.urls)
+    n = len(titles)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        layouts = [
+            ("set[str] + deque[(url, depth)]", lambda: original(titles)),
+            ("exact + packed frontier", lambda: compact(titles, ExactSeen())),
+            ("bloom + packed frontier", lambda: compact(titles, BloomSeen(n))),
+            ("bloom + spilled frontier", lambda: compact(titles, BloomSeen(n), spill_dir)),
+        ]
+        results = [(name, measure(build) / n) for name, build in layouts]
+
+    reference = results[0][1]
+    print(f"{n} URLs, average title {sum(map(len, titles)) / n:.1f} chars")
+    for name, per_url in results:
+        ratio = "baseline" if per_url == reference else f"{reference / per_url:.1f}x smaller"
+        print(f"   {name:32s} {per_url:8.1f} bytes/URL  ({ratio})")
+
+
+if __name__ == "__main__":
+    main()
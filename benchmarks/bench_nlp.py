@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Articles/second of the batched spaCy stage (utils.text_pipeline.analyze)
+for several worker process counts, against the one-document-at-a-time
+``nlp(text)`` loop with the full pipeline that it replaced.
+
+Texts are the saved articles in --articles, or stand-in articles when the
+directory is missing or empty. Needs spaCy and the model:
+
+    python -m benchmarks.bench_nlp --articles wiki_articles --processes 1 2 4
+    python -m benchmarks.bench_nlp --pages 400 --batch-size 16
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from utils.text_pipeline import NlpWorkers, analyze, load_pipeline, usable_processes
+from utils.wiki_extract import extract_bs4
+from utils.wiki_standin import render_article
+
+
+def load_texts(directory: str, pages: int):
+    paths = sorted(glob.glob(os.path.join(directory, "*.txt"))) if directory else []
+    if paths:
+        texts = []
+        for path in paths[:pages]:
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+        return texts
+    return [extract_bs4(render_article(i, pages))[0] for i in range(pages)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time batched spaCy tokenisation + NER by process count.")
+    parser.add_argument("--articles", default="wiki_articles", help="Directory of saved .txt articles")
+    parser.add_argument("--pages", type=int, default=200, help="Articles to process (default: 200)")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+
+    texts = load_texts(args.articles, args.pages)
+    words = sum(len(t.split()) for t in texts)
+    print(f"{len(texts)} articles, {words} words, {os.cpu_count()} cores")
+
+    import spacy  # optional dependency
+    full = spacy.load(args.model)
+    t0 = time.perf_counter()
+    for text in texts:
+        full(text)
+    baseline = time.perf_counter() - t0
+    print(f"{'nlp(text), full pipeline':>26}: {len(texts) / baseline:8.1f} articles/s")
+
+    nlp = load_pipeline(args.model)
+    for n in args.processes:
+        if usable_processes(n) != n:
+            print(f"{n:>3} processes: skipped, workers would be spawned rather than forked")
+            continue
+        workers = NlpWorkers(args.model, n) if n > 1 else None
+        if workers:  # let every worker load the model before timing
+            list(analyze(nlp, ((t, None) for t in texts[:2 * n * args.batch_size]),
+                         batch_size=args.batch_size, workers=workers))
+        t0 = time.perf_counter()
+        entities = 0
+        for _context, _tokens, ents in analyze(nlp, ((t, None) for t in texts),
+                                               batch_size=args.batch_size, workers=workers):
+            entities += len(ents)
+        elapsed = time.perf_counter() - t0
+        if workers:
+            workers.close()
+        print(f"{f'pipe, {n} process(es)':>26}: {len(texts) / elapsed:8.1f} articles/s "
+              f"({baseline / elapsed:.1f}x, {entities} entities)")
+
+
+if __name__ == "__main__":
+    main()
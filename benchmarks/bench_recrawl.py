@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Freshness per request of the ``--recrawl`` scheduler, in simulation.
+
+Simulates a corpus whose pages are edited with daily probabilities spread
+over several orders of magnitude (like utils.wiki_standin's ``edits``),
+refreshed once a day under a fixed budget by
+
+  - ``adaptive``: utils.recrawl.plan, the scheduler behind ``--recrawl``
+  - ``uniform``:  the least recently fetched pages first (round robin)
+
+and reports the mean share of pages whose saved copy is current, measured
+after each day's refresh once the estimates have warmed up, plus the daily
+budget round robin needs to be as fresh as the adaptive schedule. No HTTP
+is involved, so months of daily recrawls take seconds:
+
+    python -m benchmarks.bench_recrawl
+    python -m benchmarks.bench_recrawl --pages 20000 --days 120 --budgets 0.02 0.05 0.1 0.2
+"""
+
+import argparse
+import random
+import time
+
+from utils.recrawl import DAY, plan
+
+
+def simulate(policy: str, pages: int, days: int, budget: int, warmup: int, seed: int) -> float:
+    rnd = random.Random(seed)
+    # Daily edit probability, log-uniform between 1/2 and 1/1000
+    probs = [0.5 * (1 / 500) ** rnd.random() for _ in range(pages)]
+    live = [0] * pages
+    saved = [0] * pages
+    fetched = [0.0] * pages
+    fetches = [1] * pages
+    changes = [0] * pages
+    interval_sum = [0.0] * pages
+    fresh = []
+    for day in range(1, days + 1):
+        now = day * DAY
+        for i, p in enumerate(probs):
+            if rnd.random() < p:
+                live[i] += 1
+        if policy == "adaptive":
+            history = ((i, 0, fetched[i], fetches[i], changes[i], interval_sum[i]) for i in range(pages))
+            chosen = [i for _urgency, _p_changed, i, _depth in plan(history, budget, now)]
+        else:
+            chosen = sorted(range(pages), key=fetched.__getitem__)[:budget]
+        for i in chosen:
+            changes[i] += saved[i] != live[i]
+            interval_sum[i] += now - fetched[i]
+            fetches[i] += 1
+            fetched[i] = now
+            saved[i] = live[i]
+        if day > warmup:
+            fresh.append(sum(s == v for s, v in zip(saved, live)) / pages)
+    return sum(fresh) / len(fresh)
+
+
+def matching_budget(target: float, lo: int, hi: int, **kw) -> int:
+    """Smallest round-robin budget in ``(lo, hi]`` reaching ``target`` freshness (bisection)."""
+    while hi - lo > max(1, lo // 100):
+        mid = (lo + hi) // 2
+        if simulate("uniform", budget=mid, **kw) >= target:
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare adaptive and uniform recrawl scheduling.")
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--warmup", type=int, default=30, help="Days left out of the average (default: 30)")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.02, 0.05, 0.1, 0.2],
+                        help="Daily revisits as a share of the corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.pages} pages, {args.days} days (first {args.warmup} not counted)")
+    print(f"{'budget/day':>10} {'adaptive':>9} {'uniform':>9} {'uniform budget for same':>24}  {'seconds':>7}")
+    kw = dict(pages=args.pages, days=args.days, warmup=args.warmup, seed=args.seed)
+    for share in args.budgets:
+        budget = max(1, round(share * args.pages))
+        t0 = time.perf_counter()
+        adaptive = simulate("adaptive", budget=budget, **kw)
+        uniform = simulate("uniform", budget=budget, **kw)
+        if uniform >= adaptive:
+            same = f"{budget} (no saving)"
+        else:
+            needed = matching_budget(adaptive, budget, args.pages, **kw)
+            same = f"{needed} (+{needed / budget - 1:.0%})"
+        print(f"{budget:>10} {adaptive:>9.1%} {uniform:>9.1%} {same:>24}  {time.perf_counter() - t0:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
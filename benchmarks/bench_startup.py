@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup and first-use latency of the NLP scripts.
+
+For each script, a fresh interpreter in a scratch directory runs the
+script's module-level setup, i.e. every top-level statement before its
+first loop or ``__main__`` block: imports, ``lazy(...)`` bindings,
+settings and the objects it creates (caches, stores, the topic model).
+That is what the script does before its first stage starts, and how long
+it took is reported, along with any heavy module the setup already
+imported, which the script should only load once a stage needs it.
+
+The same interpreter then times the first real use of spaCy and gensim
+(``FIRST_USE``) and of each lazy module, in the order the script
+declares them. Modules already pulled in by an earlier one come almost
+for free. The last line is what startup would cost if all of them were
+loaded eagerly. Nothing is downloaded and no stage is run:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 "Web crawling pipeline.py"
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = [
+    "Web crawling pipeline.py",
+    "NLP WebPOS Code with Action Execution",
+    "WebPOS Report with Tokenization + Lemmatization + LSTM",
+]
+HEAVY = ["spacy", "gensim", "nltk", "transformers", "tensorflow", "sklearn", "matplotlib", "wordcloud"]
+
+# What each script does when a stage first needs spaCy or gensim, run in its namespace after the setup
+FIRST_USE = {
+    "Web crawling pipeline.py": [
+        ("spaCy: load_pipeline(NLP_MODEL)",
+         "import spacy\n"
+         "if not spacy.util.is_package(NLP_MODEL):\n"
+         "    raise LookupError(f'{NLP_MODEL} is not installed')\n"
+         "load_pipeline(NLP_MODEL)"),
+        ("gensim: first topics.add()", "topics.add('bench', '', ['word'])"),
+    ],
+}
+
+PROBE = r"""
+import json, sys, time
+setup, first_use, watch = sys.argv[1], json.loads(sys.argv[2]), json.loads(sys.argv[3])
+namespace = {"__name__": "__bench__"}
+t0 = time.perf_counter()
+exec(compile(setup, "setup", "exec"), namespace)
+result = {"startup": time.perf_counter() - t0, "preloaded": [m for m in watch if m in sys.modules],
+          "first_use": {}}
+for label, code in first_use:
+    t0 = time.perf_counter()
+    try:
+        exec(compile(code, label, "exec"), namespace)
+        result["first_use"][label] = time.perf_counter() - t0
+    except Exception as e:
+        result["first_use"][label] = f"{type(e).__name__}: {e}"
+print(json.dumps(result))
+"""
+
+
+def startup_code(path: str):
+    """
+    The script's module-level setup (its top-level statements up to the
+    first loop, ``with`` or ``__main__`` block) and its lazy module names.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    statements, modules = [], []
+    for node in tree.body:
+        if isinstance(node, (ast.For, ast.While, ast.With, ast.Try)) or \
+                (isinstance(node, ast.If) and "__main__" in ast.unparse(node.test)):
+            break
+        statements.append(node)
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, "id", None) == "lazy"):
+            modules.append(node.value.args[0].value)
+    return ast.unparse(ast.Module(body=statements, type_ignores=[])), modules
+
+
+def probe(code: str, first_use, watch):
+    """Run the setup and then ``first_use`` in a fresh interpreter, in a scratch directory."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as scratch:
+        out = subprocess.run([sys.executable, "-c", PROBE, code, json.dumps(first_use), json.dumps(watch)],
+                             cwd=scratch, env=env, capture_output=True, text=True)
+    if out.returncode:
+        return {"error": out.stderr.strip().splitlines()[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def fmt(value) -> str:
+    return f"{value:8.3f}s" if isinstance(value, float) else "  missing"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-use latency of the NLP scripts.")
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per script; the fastest counts (default: 3)")
+    args = parser.parse_args()
+
+    for script in args.scripts:
+        code, modules = startup_code(os.path.join(ROOT, script))
+        uses = FIRST_USE.get(script, []) + [(f"first use of {name}", f"__import__({name!r})") for name in modules]
+        watch = list(dict.fromkeys(HEAVY + modules))
+        runs = [probe(code, uses, watch) for _ in range(args.repeat)]
+        failed = [r for r in runs if "error" in r]
+        print(f"\n{script}")
+        if failed:
+            print(f"  startup failed: {failed[0]['error']}")
+            continue
+        best = min(runs, key=lambda r: r["startup"])
+        first_use = {}
+        for label, _ in uses:
+            values = [r["first_use"][label] for r in runs]
+            timings = [v for v in values if isinstance(v, float)]
+            first_use[label] = min(timings) if len(timings) == len(values) else \
+                next(v for v in values if not isinstance(v, float))
+        eager = best["startup"] + sum(v for v in first_use.values() if isinstance(v, float))
+        print(f"  {'startup (module-level setup)':<56}{fmt(best['startup'])}")
+        if best["preloaded"]:
+            print(f"  ⚠️  already imported by the setup: {', '.join(best['preloaded'])}")
+        for label, value in first_use.items():
+            note = "" if isinstance(value, float) else f"  ({value})"
+            print(f"  {label:<56}{fmt(value)}{note}")
+        missing = sum(not isinstance(v, float) for v in first_use.values())
+        print(f"  {'eager startup, installed modules only' if missing else 'eager startup':<56}{fmt(eager)}")
+
+
+if __name__ == "__main__":
+    main()
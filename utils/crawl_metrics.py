@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawl instrumentation.
+
+CrawlMetrics collects, thread-safely:
+
+  - latency histograms for the fetch, parse, clean and save stages
+  - gauges for queue depth and in-flight requests
+  - retries per status code, bytes downloaded, pages saved and duplicates skipped
+  - bytes on the wire (compressed) next to decoded bytes, and how many
+    requests reused a kept-alive connection
+  - pages/second over time (one windowed rate per snapshot)
+
+``snapshot()`` appends one JSON line to ``metrics.jsonl`` and rewrites
+``metrics.prom`` in the Prometheus text exposition format, so a node
+exporter textfile collector can pick it up.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGES = ("fetch", "parse", "clean", "save")
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets, interpolating linearly inside one."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class CrawlMetrics:
+    def __init__(self, out_dir: str = None, interval: float = 5.0):
+        self.lock = threading.Lock()
+        self.hist = {stage: Histogram() for stage in STAGES}
+        self.retries = {}          # status (or "error") -> count
+        self.giveups = 0
+        self.bytes_downloaded = 0
+        self.bytes_wire = 0
+        self.requests = 0
+        self.connections_opened = 0
+        self.pages = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.started = time.monotonic()
+
+        self.interval = interval
+        self.last_snapshot = self.started
+        self.last_pages = 0
+        self.jsonl_path = self.prom_path = None
+        if out_dir:
+            self.jsonl_path = os.path.join(out_dir, "metrics.jsonl")
+            self.prom_path = os.path.join(out_dir, "metrics.prom")
+            open(self.jsonl_path, "w").close()
+
+    # -------- recording -------- #
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            self.hist[stage].observe(seconds)
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, seconds: float, nbytes: int = 0, wire_bytes: int = None):
+        with self.lock:
+            self.in_flight -= 1
+            self.hist["fetch"].observe(seconds)
+            self.bytes_downloaded += nbytes
+            self.bytes_wire += nbytes if wire_bytes is None else wire_bytes
+
+    def connections(self, requests: int, opened: int):
+        """Running totals of HTTP requests sent and connections opened for them."""
+        with self.lock:
+            self.requests = requests
+            self.connections_opened = opened
+
+    def connection_opened(self, reused: bool):
+        with self.lock:
+            self.requests += 1
+            self.connections_opened += not reused
+
+    def retry(self, status):
+        with self.lock:
+            key = str(status) if status else "error"
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def gave_up(self):
+        with self.lock:
+            self.giveups += 1
+
+    def page_done(self, saved: bool, queue_depth: int, duplicate: bool = False):
+        with self.lock:
+            if saved:
+                self.pages += 1
+            elif duplicate:
+                self.duplicates += 1
+            else:
+                self.failed += 1
+            self.queue_depth = queue_depth
+        if self.jsonl_path and time.monotonic() - self.last_snapshot >= self.interval:
+            self.snapshot()
+
+    # -------- export -------- #
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.started
+            return {
+                "ts": time.time(),
+                "elapsed": round(elapsed, 3),
+                "pages": self.pages,
+                "failed": self.failed,
+                "duplicates": self.duplicates,
+                "pages_per_sec": round(self.pages / elapsed, 3) if elapsed > 0 else 0.0,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_wire": self.bytes_wire,
+                "bytes_per_page": round(self.bytes_downloaded / self.pages) if self.pages else 0,
+                "wire_bytes_per_page": round(self.bytes_wire / self.pages) if self.pages else 0,
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connection_reuse": round(1 - self.connections_opened / self.requests, 4)
+                if self.requests else 0.0,
+                "retries": dict(self.retries),
+                "giveups": self.giveups,
+                "latency": {
+                    stage: {"count": h.count, "sum": round(h.sum, 6),
+                            "p50": round(h.quantile(0.5), 6), "p90": round(h.quantile(0.9), 6),
+                            "p99": round(h.quantile(0.99), 6)}
+                    for stage, h in self.hist.items()
+                },
+            }
+
+    def snapshot(self):
+        """Append a JSON line (with pages/s since the last one) and rewrite the Prometheus file."""
+        now = time.monotonic()
+        with self.lock:
+            dt = now - self.last_snapshot
+            rate = (self.pages - self.last_pages) / dt if dt > 0 else 0.0
+            self.last_snapshot, self.last_pages = now, self.pages
+        data = self.to_dict()
+        data["pages_per_sec_window"] = round(rate, 3)
+        if self.jsonl_path:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(data) + "\n")
+        if self.prom_path:
+            tmp = self.prom_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp, self.prom_path)
+        return data
+
+    def prometheus(self) -> str:
+        with self.lock:
+            lines = []
+
+            def metric(name, kind, help_text, samples):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+
+            metric("wiki_crawl_pages_total", "counter", "Pages saved.",
+                   [f"wiki_crawl_pages_total {self.pages}"])
+            metric("wiki_crawl_failed_total", "counter", "Pages that could not be fetched or parsed.",
+                   [f"wiki_crawl_failed_total {self.failed}"])
+            metric("wiki_crawl_duplicates_total", "counter", "Redirects and near-duplicates not saved.",
+                   [f"wiki_crawl_duplicates_total {self.duplicates}"])
+            metric("wiki_crawl_bytes_downloaded_total", "counter", "Response bytes received.",
+                   [f"wiki_crawl_bytes_downloaded_total {self.bytes_downloaded}"])
+            metric("wiki_crawl_bytes_wire_total", "counter", "Response bytes as transferred, before decoding.",
+                   [f"wiki_crawl_bytes_wire_total {self.bytes_wire}"])
+            metric("wiki_crawl_http_requests_total", "counter", "HTTP requests sent.",
+                   [f"wiki_crawl_http_requests_total {self.requests}"])
+            metric("wiki_crawl_connections_opened_total", "counter", "New HTTP connections opened.",
+                   [f"wiki_crawl_connections_opened_total {self.connections_opened}"])
+            metric("wiki_crawl_retries_total", "counter", "Retried requests by status code.",
+                   [f'wiki_crawl_retries_total{{status="{k}"}} {v}' for k, v in sorted(self.retries.items())])
+            metric("wiki_crawl_giveups_total", "counter", "Requests abandoned after all retries.",
+                   [f"wiki_crawl_giveups_total {self.giveups}"])
+            metric("wiki_crawl_queue_depth", "gauge", "URLs waiting in the frontier.",
+                   [f"wiki_crawl_queue_depth {self.queue_depth}"])
+            metric("wiki_crawl_in_flight", "gauge", "HTTP requests currently in flight.",
+                   [f"wiki_crawl_in_flight {self.in_flight}"])
+
+            samples = []
+            for stage, h in self.hist.items():
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    samples.append(f'wiki_crawl_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                samples.append(f'wiki_crawl_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                samples.append(f'wiki_crawl_stage_seconds_sum{{stage="{stage}"}} {h.sum}')
+                samples.append(f'wiki_crawl_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            metric("wiki_crawl_stage_seconds", "histogram", "Latency per crawl stage.", samples)
+            return "\n".join(lines) + "\n"
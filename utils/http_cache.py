@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent HTTP response cache with conditional GET.
+
+Responses are stored per URL together with their ``ETag`` and
+``Last-Modified`` validators. The next request for the URL sends
+``If-None-Match`` / ``If-Modified-Since``; a ``304 Not Modified`` is then
+answered from disk. Callers can also attach their own extracted result
+(e.g. ``(body, links, title)``) so an unchanged page is not even re-parsed.
+
+The cache is a single SQLite file, bounded by ``max_bytes`` and evicted
+least-recently-used first.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class HttpCache:
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "http_cache.sqlite")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB,
+                extracted BLOB,
+                size INTEGER NOT NULL,
+                atime REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_atime ON responses (atime)")
+        self.db.commit()
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = 0       # 304s answered from disk
+        self.misses = 0     # full 200 downloads
+        self.evictions = 0
+
+    # -------- validators -------- #
+
+    def conditional_headers(self, url: str) -> dict:
+        """``If-None-Match`` / ``If-Modified-Since`` for a cached URL, else {}."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified FROM responses WHERE url=?", (url,)).fetchone()
+        if not row:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    # -------- lookups -------- #
+
+    def not_modified(self, url: str):
+        """Record a 304 for ``url`` and return the cached text (None if evicted meanwhile)."""
+        with self.lock:
+            row = self.db.execute("SELECT body FROM responses WHERE url=?", (url,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE responses SET atime=? WHERE url=?", (time.time(), url))
+            self.db.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def extracted(self, url: str):
+        """The caller's extracted result stored with ``put_extracted``, if any."""
+        with self.lock:
+            row = self.db.execute("SELECT extracted FROM responses WHERE url=?", (url,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    # -------- updates -------- #
+
+    def store(self, url: str, headers, text: str):
+        """
+        Cache a 200 response if it carries a validator worth revalidating
+        against; without one, any older copy of ``url`` is dropped so a later
+        304 to its stale validator cannot bring it back.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            with self.lock:
+                self.misses += 1
+                old = self.db.execute("SELECT size FROM responses WHERE url=?", (url,)).fetchone()
+                if old:
+                    self.db.execute("DELETE FROM responses WHERE url=?", (url,))
+                    self.total -= old[0]
+                    self.db.commit()
+            return
+        body = zlib.compress(text.encode("utf-8"))
+        with self.lock:
+            self.misses += 1
+            old = self.db.execute("SELECT size FROM responses WHERE url=?", (url,)).fetchone()
+            self.total -= old[0] if old else 0
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, extracted, size, atime) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                (url, etag, last_modified, body, len(body), time.time()))
+            self.total += len(body)
+            self._evict()
+            self.db.commit()
+
+    def put_extracted(self, url: str, value):
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with self.lock:
+            row = self.db.execute("SELECT size, extracted FROM responses WHERE url=?", (url,)).fetchone()
+            if row is None:
+                return
+            size = row[0] - (len(row[1]) if row[1] is not None else 0) + len(blob)
+            self.db.execute("UPDATE responses SET extracted=?, size=? WHERE url=?", (blob, size, url))
+            self.total += size - row[0]
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        # Drop least-recently-used entries until we are back under 90% of the bound
+        if self.total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for url, size in self.db.execute(
+                "SELECT url, size FROM responses ORDER BY atime").fetchall():
+            if self.total <= target:
+                break
+            self.db.execute("DELETE FROM responses WHERE url=?", (url,))
+            self.total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "bytes": self.total}
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+class CachedResponse:
+    """
+    The bits of ``requests.Response`` the scrapers use, plus bytes received:
+    ``nbytes`` after content decoding, ``wire_bytes`` as transferred (gzip/br).
+    """
+    def __init__(self, status_code: int, text: str, headers, from_cache: bool, nbytes: int = 0,
+                 wire_bytes: int = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.from_cache = from_cache
+        self.nbytes = nbytes
+        self.wire_bytes = nbytes if wire_bytes is None else wire_bytes
+
+
+def wire_size(resp) -> int:
+    """Body bytes as they came over the wire, before gzip/br decoding."""
+    try:
+        return resp.raw.tell()
+    except AttributeError:
+        return len(resp.content)
+
+
+def cached_get(sess, url: str, cache: HttpCache = None, **kwargs) -> CachedResponse:
+    """
+    ``sess.get(url)`` through ``cache``; ``sess`` may be ``requests`` itself.
+
+    A 304 comes back as a 200 carrying the cached text, with ``from_cache``
+    set. Without a cache this is a plain GET.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    if cache is not None:
+        headers.update(cache.conditional_headers(url))
+    resp = sess.get(url, headers=headers, **kwargs)
+    if cache is not None and resp.status_code == 304:
+        text = cache.not_modified(url)
+        if text is not None:
+            return CachedResponse(200, text, resp.headers, True, len(resp.content), wire_size(resp))
+        # Evicted between the two calls: fetch it again unconditionally
+        resp = sess.get(url, **kwargs)
+    if cache is not None and resp.status_code == 200:
+        cache.store(url, resp.headers, resp.text)
+    return CachedResponse(resp.status_code, resp.text, resp.headers, False, len(resp.content),
+                          wire_size(resp))
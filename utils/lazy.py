@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy imports and one-time provisioning of NLP models and corpora.
+
+``lazy("tensorflow.keras.models")`` returns a stand-in that imports the
+module on first attribute access, so a script only pays for TensorFlow,
+spaCy, gensim, transformers or matplotlib once a stage actually uses
+them. How long each first import took is kept in ``LOAD_TIMES`` (see
+benchmarks/bench_startup.py):
+
+    keras_models = lazy("tensorflow.keras.models")
+    ...
+    model = keras_models.Sequential([...])   # TensorFlow is imported here
+
+``ensure_nltk(...)`` and ``ensure_spacy_model(...)`` look for the data in
+the local NLTK data path or site-packages and only download what is
+missing. Each resource is checked once per process, so calling them at
+the top of every stage that needs them costs nothing after the first
+call. Unlike calling ``nltk.download`` at import time, nothing touches
+the network when everything is installed.
+"""
+
+import importlib
+import sys
+import time
+
+LOAD_TIMES = {}  # module name -> seconds its first import took
+
+# nltk.download() names -> where nltk.data.find() looks for them
+NLTK_PATHS = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+}
+
+_provisioned = set()
+
+
+class LazyModule:
+    """A module imported on first attribute access."""
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            name = self.__dict__["_name"]
+            t0 = time.perf_counter()
+            module = importlib.import_module(name)
+            LOAD_TIMES.setdefault(name, time.perf_counter() - t0)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def loaded(name: str) -> bool:
+    return name in sys.modules
+
+
+def ensure_nltk(*resources, quiet: bool = True):
+    """
+    Make sure the NLTK data packages ``resources`` are installed,
+    downloading only the missing ones. Raises LookupError for any that
+    is still missing (e.g. offline).
+    """
+    import nltk  # optional dependency
+
+    missing = []
+    for name in resources:
+        if name in _provisioned:
+            continue
+        try:
+            nltk.data.find(NLTK_PATHS.get(name, name))
+        except LookupError:
+            if not nltk.download(name, quiet=quiet):
+                missing.append(name)
+                continue
+        _provisioned.add(name)
+    if missing:
+        raise LookupError(f"NLTK data not installed and could not be downloaded: {', '.join(missing)}")
+
+
+def ensure_spacy_model(name: str = "en_core_web_sm"):
+    """Make sure the spaCy model package ``name`` is installed, downloading it if not."""
+    key = f"spacy:{name}"
+    if key in _provisioned:
+        return
+    import spacy  # optional dependency
+
+    if not spacy.util.is_package(name):
+        from spacy.cli import download
+        download(name)
+        importlib.invalidate_caches()
+    _provisioned.add(key)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+The crawl's link graph on disk, in compressed sparse row (CSR) form.
+
+Every article, crawled or only linked to, gets an integer id in order of
+first appearance. ``<dir>/nodes.txt`` holds the title key of id ``i`` on
+line ``i``. While crawling, edges are appended to ``edges.bin`` as uint32
+``(source, target)`` pairs. ``close()`` turns them into
+
+  - ``offsets.npy``: int64, length n + 1; the links of ``i`` are
+    ``targets[offsets[i]:offsets[i + 1]]``
+  - ``targets.npy``: int32 target ids, sorted and de-duplicated per source
+
+Both load with ``mmap_mode="r"``, so opening a large graph costs nothing
+until it is used:
+
+    graph = LinkGraph.load("machine_learning_wiki_articles/graph")
+    ranks = graph.pagerank()
+    python -m utils.link_graph machine_learning_wiki_articles/graph --top 20
+"""
+
+import argparse
+import os
+from array import array
+
+import numpy as np
+
+EDGE_DTYPE = np.dtype("<u4")
+
+
+class LinkGraphWriter:
+    """
+    Collects edges during a crawl. New nodes and edges stay in memory until
+    ``flush()``, which the crawler calls as its checkpoint commits, so the
+    files never get ahead of the checkpoint by more than one flush. With
+    ``resume`` the existing nodes and edges are kept, less any partial
+    line or pair a crash cut off; pages recorded twice (refetched after a
+    crash) only add duplicate edges, which ``close()`` drops.
+    """
+    def __init__(self, directory: str, resume: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ids = {}
+        nodes_path = os.path.join(directory, "nodes.txt")
+        edges_path = os.path.join(directory, "edges.bin")
+        if resume and os.path.exists(nodes_path):
+            with open(nodes_path, "r+b") as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                f.truncate(end)
+            for key in data[:end].decode("utf-8").split("\n")[:-1]:
+                self.ids[key] = len(self.ids)
+            if os.path.exists(edges_path):
+                size = os.path.getsize(edges_path)
+                with open(edges_path, "r+b") as f:
+                    f.truncate(size - size % (2 * EDGE_DTYPE.itemsize))  # whole (source, target) pairs
+        else:
+            for path in (nodes_path, edges_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.nodes_fp = open(nodes_path, "a", encoding="utf-8")
+        self.edges_fp = open(edges_path, "ab")
+        self.new_nodes = []
+        self.edges = array("I")
+
+    def node(self, key: str) -> int:
+        i = self.ids.get(key)
+        if i is None:
+            i = self.ids[key] = len(self.ids)
+            self.new_nodes.append(key)
+        return i
+
+    def add_page(self, key: str, targets):
+        src = self.node(key)
+        for target in targets:
+            self.edges.append(src)
+            self.edges.append(self.node(target))
+
+    def flush(self):
+        """Write out buffered nodes and edges; call it whenever the crawl checkpoint commits."""
+        # Nodes first: on disk, an edge never refers to a node that is not
+        if self.new_nodes:
+            self.nodes_fp.write("".join(key + "\n" for key in self.new_nodes))
+            self.new_nodes.clear()
+        self.nodes_fp.flush()
+        if self.edges:
+            self.edges.tofile(self.edges_fp)
+            del self.edges[:]
+        self.edges_fp.flush()
+
+    def close(self):
+        self.flush()
+        self.nodes_fp.close()
+        self.edges_fp.close()
+        build_csr(self.directory, len(self.ids))
+
+
+def build_csr(directory: str, n: int):
+    """Turn ``edges.bin`` into ``offsets.npy`` / ``targets.npy`` for ``n`` nodes."""
+    path = os.path.join(directory, "edges.bin")
+    pairs = np.fromfile(path, dtype=EDGE_DTYPE).reshape(-1, 2) if os.path.getsize(path) else \
+        np.empty((0, 2), dtype=EDGE_DTYPE)
+    # One sort by (source, target) both groups the rows and exposes duplicates
+    packed = np.unique(pairs[:, 0].astype(np.uint64) << np.uint64(32) | pairs[:, 1])
+    sources = (packed >> np.uint64(32)).astype(np.int64)
+    targets = (packed & np.uint64(0xFFFFFFFF)).astype(np.int32)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    np.save(os.path.join(directory, "offsets.npy"), offsets)
+    np.save(os.path.join(directory, "targets.npy"), targets)
+
+
+class LinkGraph:
+    def __init__(self, offsets, targets, directory: str = None):
+        self.offsets = offsets
+        self.targets = targets
+        self.directory = directory
+        self._nodes = None
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "LinkGraph":
+        mode = "r" if mmap else None
+        return cls(np.load(os.path.join(directory, "offsets.npy"), mmap_mode=mode),
+                   np.load(os.path.join(directory, "targets.npy"), mmap_mode=mode), directory)
+
+    @property
+    def n(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nodes(self):
+        """Title keys by id (read from nodes.txt on first use)."""
+        if self._nodes is None:
+            with open(os.path.join(self.directory, "nodes.txt"), encoding="utf-8") as f:
+                self._nodes = [line.rstrip("\n") for line in f]
+        return self._nodes
+
+    def out_links(self, i: int):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def out_degree(self):
+        return np.diff(self.offsets)
+
+    def in_degree(self):
+        return np.bincount(self.targets, minlength=self.n)
+
+    def pagerank(self, damping: float = 0.85, tol: float = 1e-9, max_iter: int = 100):
+        """
+        PageRank by power iteration. Rank from pages without out-links
+        (including the ones never crawled) is spread evenly over all pages.
+        Uses a scipy.sparse matrix when SciPy is installed, else np.bincount.
+        """
+        n = self.n
+        if n == 0:
+            return np.zeros(0)
+        out_deg = self.out_degree()
+        dangling = out_deg == 0
+        inv_deg = np.zeros(n)
+        np.divide(1.0, out_deg, out=inv_deg, where=~dangling)
+
+        try:
+            from scipy import sparse  # optional dependency
+            data = np.ones(len(self.targets), dtype=np.float64)
+            matrix = sparse.csr_matrix((data, self.targets, self.offsets), shape=(n, n)).T.tocsr()
+            spread = matrix.dot
+        except ImportError:
+            sources = np.repeat(np.arange(n), out_deg)
+            targets = np.asarray(self.targets)
+
+            def spread(x):
+                return np.bincount(targets, weights=x[sources], minlength=n)
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            new = damping * spread(rank * inv_deg)
+            new += (1.0 - damping + damping * rank[dangling].sum()) / n
+            done = np.abs(new - rank).sum() < tol
+            rank = new
+            if done:
+                break
+        return rank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank the articles of a saved crawl link graph.")
+    parser.add_argument("graph_dir", help="The crawl's graph directory, e.g. <out>/graph")
+    parser.add_argument("--top", type=int, default=20, help="How many articles to list (default: 20)")
+    parser.add_argument("--damping", type=float, default=0.85)
+    args = parser.parse_args()
+
+    graph = LinkGraph.load(args.graph_dir)
+    ranks = graph.pagerank(args.damping)
+    in_deg = graph.in_degree()
+    print(f"{graph.n} articles, {len(graph.targets)} links")
+    for i in np.argsort(-ranks)[:args.top]:
+        print(f"{ranks[i]:.6f}  in={in_deg[i]:<6d} {graph.nodes[i]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched article fetches through the MediaWiki ``action=query`` API.
+
+One request asks for the current wikitext of up to 50 titles
+(``prop=revisions``, the API's per-request title limit). When the response
+would be too large, MediaWiki returns part of the pages plus a ``continue``
+object; the same query is repeated with those parameters until it is
+complete. Normalised titles (``Machine_learning`` -> ``Machine learning``)
+and redirects are followed back to the title that was asked for.
+
+The wikitext is turned into paragraphs and links by utils/wikitext.py, so
+the scraper can save API pages exactly like downloaded HTML ones.
+"""
+
+import json
+from urllib.parse import urlencode
+
+API_PATH = "/w/api.php"
+MAX_TITLES = 50
+
+
+def query_params(titles) -> dict:
+    return {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "prop": "revisions",
+        "rvprop": "content",
+        "rvslots": "main",
+        "redirects": "1",
+        "titles": "|".join(titles),
+    }
+
+
+def query_url(api_url: str, titles, cont: dict = None) -> str:
+    params = query_params(titles)
+    params.update(cont or {})
+    return f"{api_url}?{urlencode(params)}"
+
+
+def _resolve(title: str, mapping: dict) -> str:
+    seen = set()
+    while title in mapping and title not in seen:  # redirect loops end where they started
+        seen.add(title)
+        title = mapping[title]
+    return title
+
+
+def fetch_batch(get, api_url: str, titles):
+    """
+    ``{requested title: (page title, wikitext) or None}`` for up to 50 titles.
+
+    ``get(url)`` returns a response with ``status_code`` and ``text`` (or
+    None on failure), e.g. ``PoliteSession.get``. A title maps to None when
+    the page does not exist; the whole batch is None if a request fails.
+    """
+    titles = list(titles)[:MAX_TITLES]
+    aliases = {}   # normalised or redirected title -> where it leads
+    pages = {}     # page title -> wikitext (None while still to come, or missing)
+    cont = {}
+    while True:
+        resp = get(query_url(api_url, titles, cont))
+        if resp is None or resp.status_code != 200:
+            return None
+        try:
+            data = json.loads(resp.text)
+        except ValueError:
+            return None
+        if "error" in data:
+            return None
+        query = data.get("query", {})
+        for m in query.get("normalized", []) + query.get("redirects", []):
+            aliases[m["from"]] = m["to"]
+        for page in query.get("pages", []):
+            revisions = page.get("revisions")
+            if revisions:
+                pages[page["title"]] = revisions[0]["slots"]["main"].get("content", "")
+            else:
+                pages.setdefault(page["title"], None)
+        cont = data.get("continue")
+        if not cont:
+            break
+
+    out = {}
+    for title in titles:
+        page_title = _resolve(title, aliases)
+        text = pages.get(page_title)
+        out[title] = (page_title, text) if text is not None else None
+    return out
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Duplicate and near-duplicate article detection.
+
+Two pages count as the same article when
+
+  - they have the same title: Wikipedia serves a redirect's target under
+    the redirect's URL, with the target's title in ``firstHeading``; or
+  - the 64-bit SimHashes of their cleaned bodies (over 3-word shingles)
+    differ in at most ``max_distance`` bits, as with mirrored stubs, and
+    the bodies are confirmed to be near-identical: lengths within
+    ``MAX_LENGTH_DIFF`` and, when the caller can supply the saved text,
+    a shingle Jaccard similarity of at least ``MIN_JACCARD``.
+
+The confirmation matters for Wikipedia's templated stubs ("X is a village
+in Gmina Y, ..."): distinct articles from one template share most of their
+shingles, and a few of every few hundred land within a handful of bits.
+
+Fingerprints are split into ``max_distance + 1`` bands: two fingerprints
+within that distance must agree on at least one whole band, so a lookup
+only compares against pages sharing a band instead of every saved page.
+"""
+
+import hashlib
+import re
+
+import numpy as np
+
+WORD_RE = re.compile(r"\w+")
+SHINGLE = 3
+MIN_SHINGLES = 8  # shorter bodies are only matched by title
+MAX_LENGTH_DIFF = 0.05  # near-duplicates differ in length by at most this share
+MIN_JACCARD = 0.9       # ... and share at least this share of their shingles
+
+
+def shingles(text: str) -> set:
+    words = WORD_RE.findall(text.lower())
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def similar_length(a: int, b: int) -> bool:
+    return abs(a - b) <= MAX_LENGTH_DIFF * max(a, b)
+
+
+def same_text(a: str, b: str) -> bool:
+    """Whether two bodies are near-identical: similar length and shingle Jaccard >= MIN_JACCARD."""
+    if not similar_length(len(a), len(b)):
+        return False
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) >= MIN_JACCARD * len(sa | sb)
+
+
+def simhash(text: str):
+    """64-bit SimHash of ``text``'s word shingles, or None when it is too short to be telling."""
+    shingles_ = shingles(text)
+    if len(shingles_) < MIN_SHINGLES:
+        return None
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles_)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles_)
+    return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+
+def to_signed(fp: int) -> int:
+    """Fingerprint as a signed 64-bit integer, the range SQLite stores."""
+    return fp - (1 << 64) if fp >= 1 << 63 else fp
+
+
+def from_signed(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class DuplicateIndex:
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        n = max_distance + 1
+        self.bands = [(64 * i // n, 64 * (i + 1) // n) for i in range(n)]
+        self.tables = [{} for _ in self.bands]  # band value -> [(fingerprint, url, length)]
+        self.titles = {}                        # title -> url
+
+    def _keys(self, fp: int):
+        for lo, hi in self.bands:
+            yield (fp >> lo) & ((1 << (hi - lo)) - 1)
+
+    def find(self, title: str, fp, length: int = None, confirm=None) -> str:
+        """
+        URL of an already saved copy of this article, or None. A SimHash
+        match also needs a body ``length`` (in bytes) close to the saved
+        page's when both are known, and ``confirm(url)`` to hold when given
+        (e.g. a ``same_text`` check against the saved body).
+        """
+        if title and title in self.titles:
+            return self.titles[title]
+        if fp is None:
+            return None
+        checked = set()
+        for table, key in zip(self.tables, self._keys(fp)):
+            for other, url, other_length in table.get(key, ()):
+                if url in checked or (fp ^ other).bit_count() > self.max_distance:
+                    continue
+                checked.add(url)
+                if length is not None and other_length is not None and not similar_length(length, other_length):
+                    continue
+                if confirm is None or confirm(url):
+                    return url
+        return None
+
+    def add(self, url: str, title: str, fp, length: int = None):
+        if title:
+            self.titles.setdefault(title, url)
+        if fp is not None:
+            for table, key in zip(self.tables, self._keys(fp)):
+                table.setdefault(key, []).append((fp, url, length))
+
+    def __len__(self) -> int:
+        return len(self.titles)
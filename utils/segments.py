@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Packed article output: append-only, gzip-compressed JSONL segments.
+
+Each article is one JSON line compressed as its own gzip member, so a
+segment is an ordinary ``.jsonl.gz`` file (``zcat`` works) and any article
+can still be decompressed on its own. Next to every segment an ``.idx`` file
+holds one ``(offset, length)`` pair per record for random access.
+
+A record is addressed by a ref ``"seg-00000.jsonl.gz:<offset>:<length>"``,
+which is what index.csv stores in its ``file`` column in this mode.
+
+    reader = SegmentReader("machine_learning_wiki_articles/segments")
+    for article in reader:              # mmap-backed, no per-record copies
+        print(article["title"], len(article["body"]))
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+
+IDX_ENTRY = struct.Struct("<QI")  # offset, length
+SEGMENT_RE = re.compile(r"^seg-(\d{5})\.jsonl\.gz$")
+
+
+def segment_name(n: int) -> str:
+    return f"seg-{n:05d}.jsonl.gz"
+
+
+def parse_ref(ref: str):
+    name, offset, length = ref.rsplit(":", 2)
+    return name, int(offset), int(length)
+
+
+def read_ref(directory: str, ref: str):
+    """The record at ``ref``, read without mapping the segment; None if it is not on disk yet."""
+    name, offset, length = parse_ref(ref)
+    try:
+        with open(os.path.join(directory, name), "rb") as f:
+            f.seek(offset)
+            blob = f.read(length)
+    except FileNotFoundError:
+        return None
+    if len(blob) < length:  # still in the writer's buffer
+        return None
+    return json.loads(zlib.decompress(blob, 31))
+
+
+def _gzip(data: bytes) -> bytes:
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    return c.compress(data) + c.flush()
+
+
+class SegmentWriter:
+    """
+    Appends records to the current segment, batching writes.
+
+    Records are buffered and written, flushed and (optionally) fsynced every
+    ``flush_every`` records; ``append`` returns True when that happened so
+    the caller can commit whatever refers to the flushed records. Segments
+    rotate at ``max_bytes``, always on a flush boundary.
+
+    Without ``resume`` any existing segments are deleted. With it, records
+    past the last of ``committed_refs`` are dropped, and committed refs
+    whose record never reached the disk are listed in ``lost``.
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024,
+                 flush_every: int = 256, fsync: bool = True, committed_refs=(), resume: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.buf = []
+        self.idx_buf = []
+        self.lost = []
+
+        self.number = 0
+        self._truncate_uncommitted(committed_refs if resume else ())
+        self._open()
+
+    def _truncate_uncommitted(self, committed_refs):
+        # Records flushed after the last checkpoint commit are dropped, so a
+        # resumed crawl does not end up with two copies of a refetched page.
+        # That includes whole segments rotated in after the commit.
+        last = (0, 0)  # (segment number, end offset) of the last committed record
+        sizes = {}
+        for ref in committed_refs:
+            seg, offset, length = parse_ref(ref)
+            if seg not in sizes:
+                seg_path = os.path.join(self.directory, seg)
+                sizes[seg] = os.path.getsize(seg_path) if os.path.exists(seg_path) else 0
+            if offset + length > sizes[seg]:
+                # Committed before its record was flushed: not on disk, so not committed
+                self.lost.append(ref)
+                continue
+            last = max(last, (int(SEGMENT_RE.match(seg).group(1)), offset + length))
+        self.number, end = last
+        for name in os.listdir(self.directory):
+            m = SEGMENT_RE.match(name[:-4] if name.endswith(".idx") else name)
+            if m and int(m.group(1)) > self.number:
+                os.remove(os.path.join(self.directory, name))
+        path = os.path.join(self.directory, segment_name(self.number))
+        if os.path.exists(path):
+            with open(path, "r+b") as f:
+                f.truncate(min(end, os.path.getsize(path)))  # never zero-extend
+        idx_path = path + ".idx"
+        if os.path.exists(idx_path):
+            with open(idx_path, "r+b") as f:
+                data = f.read()
+                keep = sum(1 for off, _ in IDX_ENTRY.iter_unpack(data) if off < end)
+                f.truncate(keep * IDX_ENTRY.size)
+
+    def _open(self):
+        path = os.path.join(self.directory, segment_name(self.number))
+        self.fp = open(path, "ab")
+        self.idx_fp = open(path + ".idx", "ab")
+        self.offset = self.fp.tell()
+
+    def append(self, record: dict):
+        """Queue ``record``; returns ``(ref, flushed)``."""
+        blob = _gzip((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        ref = f"{segment_name(self.number)}:{self.offset}:{len(blob)}"
+        self.buf.append(blob)
+        self.idx_buf.append(IDX_ENTRY.pack(self.offset, len(blob)))
+        self.offset += len(blob)
+        flushed = len(self.buf) >= self.flush_every or self.offset >= self.max_bytes
+        if flushed:
+            self.flush()
+        return ref, flushed
+
+    def read(self, ref: str):
+        """The record at ``ref``, also while it is still buffered; None if it is not on disk."""
+        name, offset, length = parse_ref(ref)
+        if name == segment_name(self.number):
+            start = self.offset - sum(len(blob) for blob in self.buf)
+            for blob in self.buf:
+                if start == offset:
+                    return json.loads(zlib.decompress(blob, 31))
+                start += len(blob)
+        return read_ref(self.directory, ref)
+
+    def flush(self):
+        if self.buf:
+            self.fp.write(b"".join(self.buf))
+            self.idx_fp.write(b"".join(self.idx_buf))
+            self.buf.clear()
+            self.idx_buf.clear()
+        self.fp.flush()
+        self.idx_fp.flush()
+        if self.fsync:
+            os.fsync(self.fp.fileno())
+            os.fsync(self.idx_fp.fileno())
+        if self.offset >= self.max_bytes:
+            self.fp.close()
+            self.idx_fp.close()
+            self.number += 1
+            self._open()
+
+    def close(self):
+        self.flush()
+        self.fp.close()
+        self.idx_fp.close()
+
+
+class SegmentReader:
+    """Random and sequential access to the records of a segment directory."""
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.maps = {}
+
+    def _map(self, name: str):
+        if name not in self.maps:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else None
+            self.maps[name] = (mm, memoryview(mm) if mm else memoryview(b""))
+        return self.maps[name][1]
+
+    def get(self, ref: str) -> dict:
+        name, offset, length = parse_ref(ref)
+        view = self._map(name)
+        return json.loads(zlib.decompress(view[offset:offset + length], 31))
+
+    def segments(self):
+        return sorted(n for n in os.listdir(self.directory) if SEGMENT_RE.match(n))
+
+    def __iter__(self):
+        for name in self.segments():
+            view = self._map(name)
+            with open(os.path.join(self.directory, name + ".idx"), "rb") as f:
+                entries = f.read()
+            for offset, length in IDX_ENTRY.iter_unpack(entries):
+                if offset + length <= len(view):
+                    yield json.loads(zlib.decompress(view[offset:offset + length], 31))
+
+    def close(self):
+        for mm, view in self.maps.values():
+            view.release()
+            if mm is not None:
+                mm.close()
+        self.maps.clear()
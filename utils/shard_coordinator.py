@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coordination for sharded crawls (``wiki scrapper.py --shard i/N``).
+
+Every article belongs to exactly one shard, ``crc32(title key) % N``. A
+shard crawls only its own articles and forwards links to other shards'
+articles through a single SQLite file, so shards can be processes on one
+machine or on several machines sharing a filesystem. No server is needed.
+
+  - ``links``:  forwarded URLs by owning shard; the URL is the primary key,
+                so an article forwarded by many shards is queued once
+  - ``shards``: each shard's state (``busy``, ``idle`` or ``done``) and pages saved
+
+The crawl is finished when all N shards have registered, none is busy, and
+no unclaimed link is left for a shard that is not done. A shard only goes
+idle after pushing its forwards, so once that holds no new work can appear.
+
+The file uses SQLite's rollback journal rather than WAL, which needs shared
+memory and so only works for processes on one host.
+"""
+
+import os
+import sqlite3
+import time
+import zlib
+
+
+def shard_of(key: bytes, shards: int) -> int:
+    return zlib.crc32(key) % shards
+
+
+def parse_shard(spec: str):
+    """``"i/N"`` -> ``(i, N)``, with ``0 <= i < N``."""
+    i, n = (int(x) for x in spec.split("/", 1))
+    if not 0 <= i < n:
+        raise ValueError(f"shard {spec!r}: need 0 <= i < N")
+    return i, n
+
+
+class ShardCoordinator:
+    def __init__(self, path: str, shard: int, shards: int, timeout: float = 60.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.shard = shard
+        self.shards = shards
+        self.db = sqlite3.connect(path, timeout=timeout)
+        self.db.execute("PRAGMA journal_mode=DELETE")
+        with self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS links (
+                    url TEXT PRIMARY KEY,
+                    shard INTEGER NOT NULL,
+                    depth INTEGER NOT NULL,
+                    claimed INTEGER NOT NULL DEFAULT 0
+                )""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS links_unclaimed ON links (shard, claimed)")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS shards (
+                    shard INTEGER PRIMARY KEY,
+                    shards INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    saved INTEGER NOT NULL DEFAULT 0,
+                    updated REAL NOT NULL
+                )""")
+            other = self.db.execute("SELECT shards FROM shards WHERE shards != ? LIMIT 1", (shards,)).fetchone()
+            if other:
+                raise ValueError(f"coordinator {path} belongs to a crawl with {other[0]} shards, not {shards}")
+        self.set_state("busy")
+
+    def owner(self, key: bytes) -> int:
+        return shard_of(key, self.shards)
+
+    def forward(self, rows):
+        """Queue ``(url, key, depth)`` rows for their owners; repeated URLs are ignored."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO links (url, shard, depth) VALUES (?, ?, ?)",
+                ((url, self.owner(key), depth) for url, key, depth in rows))
+
+    def unclaimed(self, limit: int = 10_000):
+        """Links forwarded to this shard that it has not claimed yet, as ``(url, depth)``."""
+        return self.db.execute(
+            "SELECT url, depth FROM links WHERE shard=? AND claimed=0 LIMIT ?",
+            (self.shard, limit)).fetchall()
+
+    def claimed(self, urls):
+        """Mark links as taken; call after they are safely in the shard's own checkpoint."""
+        with self.db:
+            self.db.executemany("UPDATE links SET claimed=1 WHERE url=?", ((u,) for u in urls))
+
+    def set_state(self, state: str, saved: int = None):
+        with self.db:
+            self.db.execute(
+                "INSERT INTO shards (shard, shards, state, saved, updated) VALUES (?, ?, ?, COALESCE(?, 0), ?) "
+                "ON CONFLICT(shard) DO UPDATE SET state=excluded.state, "
+                "saved=COALESCE(?, saved), updated=excluded.updated",
+                (self.shard, self.shards, state, saved, time.time(), saved))
+
+    def finished(self) -> bool:
+        self.db.execute("BEGIN")  # one read transaction, so both checks see the same moment
+        try:
+            rows = self.db.execute("SELECT shard, state FROM shards").fetchall()
+            if len(rows) < self.shards or any(state == "busy" for _, state in rows):
+                return False
+            done = [shard for shard, state in rows if state == "done"]
+            marks = ",".join("?" * len(done))
+            pending = self.db.execute(
+                f"SELECT 1 FROM links WHERE claimed=0 AND shard NOT IN ({marks}) LIMIT 1", done).fetchone()
+            return pending is None
+        finally:
+            self.db.execute("COMMIT")
+
+    def saved(self) -> int:
+        return self.db.execute("SELECT COALESCE(SUM(saved), 0) FROM shards").fetchone()[0]
+
+    def close(self):
+        self.db.close()
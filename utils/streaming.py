@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded, threaded stages for streaming pipelines.
+
+``threaded(items)`` runs a generator (or any iterable) on its own thread
+and hands its items over through a queue of at most ``maxsize`` entries.
+Chaining them turns a sequence of generator stages into a pipeline whose
+stages run concurrently, while the producer blocks once it is
+``maxsize`` items ahead. Memory is then bounded by the queue sizes, not
+by the amount of data:
+
+    pages = threaded(crawl(), maxsize=8)          # fetches while the rest works
+    docs = threaded(tokenize(pages), maxsize=8)
+    for doc in docs:
+        summarize(doc)
+
+An exception in a stage is re-raised in the consumer.
+"""
+
+import queue
+import threading
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def threaded(items, maxsize: int = 8, name: str = None):
+    """Yield ``items``, produced on a background thread at most ``maxsize`` ahead."""
+    q = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:  # handed to the consumer
+            put(_Failed(e))
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        # The consumer stopped early (or is done): let the producer exit instead of blocking forever
+        stop.set()
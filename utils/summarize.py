@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extractive TextRank summaries, in place of ``gensim.summarization``
+(removed in gensim 4).
+
+Sentences become TF-IDF vectors in a ``scipy.sparse`` matrix ``X`` with
+unit rows, so ``X @ X.T`` holds their cosine similarities. PageRank over
+that weighted graph scores each sentence by how much of the article it
+shares words with. As in gensim, the best ``int(ratio * sentences)``
+sentences are returned in their original order, one per line. A full
+stop after a common abbreviation ("Dr.", "e.g.", "Jan.") or an initial
+("J. R. R. Tolkien", "U.S.") does not end a sentence.
+
+``Summarizer`` runs ``summarize`` on a process pool and keeps the results
+in SQLite keyed by a hash of the text, so an unchanged article is never
+summarised twice:
+
+    summarizer = Summarizer("summary_cache.sqlite", ratio=0.2, processes=4)
+    summarizer.submit(name, body, on_done)   # on_done(name, summary) in this thread
+    summarizer.close()
+    python -m utils.summarize article.txt --ratio 0.2
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# A sentence ends at . ! or ? (and any closing quotes or brackets) before a capital or digit
+SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*(?=\s+[\"'(\[]?[A-Z0-9])")
+LAST_WORD_RE = re.compile(r"(?:^|[\s(\[\"'])([A-Za-z][A-Za-z.]*)$")
+INITIALS_RE = re.compile(r"(?:[A-Za-z]\.)*[A-Za-z]")  # "J", "U.S", "e.g"
+ABBREVIATIONS = frozenset("""
+    mr mrs ms dr prof sr jr st mt rev gen col lt sgt capt gov sen rep
+    vs etc al approx ca cf fig vol pp ed eds est inc ltd co corp dept univ
+    jan feb mar apr jun jul aug sep sept oct nov dec
+""".split())
+WORD_RE = re.compile(r"[a-z][a-z0-9]+")
+MIN_WORDS = 3  # shorter fragments ("See also.") are never picked
+VERSION = 2  # part of the cache key; bump when summaries of the same text change
+
+
+def is_abbreviation(text: str) -> bool:
+    """Whether ``text``, up to a full stop, ends in an abbreviation or initial."""
+    m = LAST_WORD_RE.search(text)
+    return bool(m) and (m.group(1).lower() in ABBREVIATIONS or INITIALS_RE.fullmatch(m.group(1)) is not None)
+
+
+def split_sentences(text: str):
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n?", text):
+        start = 0
+        for m in SENTENCE_END_RE.finditer(paragraph):
+            if paragraph[m.start()] == "." and is_abbreviation(paragraph[start:m.start()]):
+                continue
+            sentences.append(paragraph[start:m.end()].strip())
+            start = m.end()
+        sentences.append(paragraph[start:].strip())
+    return [s for s in sentences if s]
+
+
+def tfidf(sentences):
+    """Sentence x term TF-IDF matrix (scipy.sparse CSR) with L2-normalised rows."""
+    from scipy import sparse  # optional dependency
+
+    vocab, rows, cols = {}, [], []
+    for i, sentence in enumerate(sentences):
+        for word in WORD_RE.findall(sentence.lower()):
+            rows.append(i)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(sentences), len(vocab)))
+    counts.sum_duplicates()
+    df = np.bincount(counts.indices, minlength=len(vocab))
+    idf = np.log((1 + len(sentences)) / (1 + df)) + 1.0
+    weighted = counts.multiply(idf).tocsr()
+    weighted.data = weighted.data.astype(np.float64)
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ weighted
+
+
+def textrank(similarity, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100):
+    """PageRank over a symmetric sparse similarity matrix; isolated sentences spread rank evenly."""
+    from scipy import sparse  # optional dependency
+
+    n = similarity.shape[0]
+    similarity = sparse.csr_matrix(similarity)
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    strength = np.asarray(similarity.sum(axis=1)).ravel()
+    isolated = strength == 0
+    inv = np.zeros(n)
+    np.divide(1.0, strength, out=inv, where=~isolated)
+    spread = (sparse.diags(inv) @ similarity).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        new = damping * (spread @ rank)
+        new += (1.0 - damping + damping * rank[isolated].sum()) / n
+        done = np.abs(new - rank).sum() < tol
+        rank = new
+        if done:
+            break
+    return rank
+
+
+def summarize(text: str, ratio: float = 0.2) -> str:
+    """
+    The ``int(ratio * sentences)`` top-ranked sentences of ``text``, in
+    order, one per line; empty when that is none (as with fewer than two
+    sentences).
+    """
+    sentences = split_sentences(text)
+    count = math.floor(len(sentences) * ratio) if len(sentences) > 1 else 0
+    if count <= 0:
+        return ""
+    vectors = tfidf(sentences)
+    rank = textrank(vectors @ vectors.T)
+    rank[[len(WORD_RE.findall(s.lower())) < MIN_WORDS for s in sentences]] = -1.0
+    best = np.sort(np.argsort(-rank, kind="stable")[:count])
+    return "\n".join(sentences[i] for i in best)
+
+
+def text_hash(text: str, ratio: float) -> str:
+    return hashlib.blake2b(f"{VERSION}\0{ratio}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS summaries (hash TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+
+    def get(self, key: str):
+        row = self.db.execute("SELECT summary FROM summaries WHERE hash=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, summary: str):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO summaries (hash, summary) VALUES (?, ?)", (key, summary))
+
+    def close(self):
+        self.db.close()
+
+
+class Summarizer:
+    """
+    Summaries from the cache, or from ``processes`` worker processes
+    (inline when ``processes <= 1``). ``on_done(name, summary)`` is always
+    called from the submitting thread, in ``submit`` or ``close``. At most
+    twice ``processes`` articles are in flight at a time.
+    """
+    def __init__(self, cache_path: str = None, ratio: float = 0.2, processes: int = 1):
+        self.ratio = ratio
+        self.cache = SummaryCache(cache_path) if cache_path else None
+        self.pool = ProcessPoolExecutor(processes) if processes > 1 else None
+        if self.pool:
+            self.pool.submit(int)  # fork the workers now, before the caller starts threads
+        self.limit = 2 * processes
+        self.running = {}
+        self.hits = self.misses = 0
+
+    def submit(self, name: str, text: str, on_done):
+        key = text_hash(text, self.ratio)
+        summary = self.cache.get(key) if self.cache else None
+        if summary is not None:
+            self.hits += 1
+            on_done(name, summary)
+            return
+        self.misses += 1
+        if self.pool is None:
+            self._finish(name, key, summarize(text, self.ratio), on_done)
+            return
+        self.running[self.pool.submit(summarize, text, self.ratio)] = (name, key, on_done)
+        self._collect(block=len(self.running) >= self.limit)
+
+    def _finish(self, name, key, summary, on_done):
+        if self.cache:
+            self.cache.put(key, summary)
+        on_done(name, summary)
+
+    def _collect(self, block: bool = False):
+        done, _ = wait(self.running, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, key, on_done = self.running.pop(future)
+            self._finish(name, key, future.result(), on_done)
+
+    def close(self):
+        while self.running:
+            self._collect(block=True)
+        if self.pool:
+            self.pool.shutdown()
+        if self.cache:
+            self.cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a TextRank summary of a text file.")
+    parser.add_argument("path")
+    parser.add_argument("--ratio", type=float, default=0.2, help="Share of the sentences to keep (default: 0.2)")
+    args = parser.parse_args()
+    with open(args.path, encoding="utf-8") as f:
+        print(summarize(f.read(), args.ratio))
+
+
+if __name__ == "__main__":
+    main()
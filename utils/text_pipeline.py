@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched tokenisation, stopword filtering and NER in one spaCy pass.
+
+``analyze`` feeds ``(text, context)`` pairs through ``nlp.pipe``, which
+tokenises and tags ``batch_size`` texts at a time. Components whose output
+is not used (``UNUSED_PIPES``) are switched off, so a document costs the
+tokenizer plus the NER model:
+
+    nlp = load_pipeline("en_core_web_sm")
+    for context, tokens, entities in analyze(nlp, pages, stop_words):
+        ...
+
+With ``workers=NlpWorkers(model, 4)`` the batches are tagged in worker
+processes with their own copy of the model instead. Like ``Summarizer``,
+the workers are forked when the object is created, so create it before
+starting any thread. A batch comes back as soon as it is tagged, and at
+most two per worker are in flight, so a small ``batch_size`` keeps
+results flowing while the input is still being produced.
+
+Entities are collected in an ``EntityIndex`` mapping ``(text, label)`` to
+the documents they occur in, saved as one JSON file with documents stored
+once and referred to by number.
+"""
+
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from utils.lazy import ensure_spacy_model
+
+UNUSED_PIPES = ("parser", "lemmatizer", "tagger", "attribute_ruler", "senter")
+
+
+def load_pipeline(model: str = "en_core_web_sm", disable=UNUSED_PIPES):
+    """Load a spaCy model with the components in ``disable`` switched off (unknown names are ignored)."""
+    import spacy  # optional dependency
+
+    ensure_spacy_model(model)
+    nlp = spacy.load(model)
+    nlp.select_pipes(disable=[name for name in disable if name in nlp.pipe_names])
+    return nlp
+
+
+def usable_processes(n_process: int) -> int:
+    """
+    ``n_process``, or 1 where workers would be spawned rather than forked:
+    spawned workers re-import the calling script, and the pipeline scripts
+    run their crawl at import time.
+    """
+    if n_process == -1:
+        n_process = os.cpu_count() or 1
+    return n_process if multiprocessing.get_start_method() == "fork" else 1
+
+
+def keep_token(token, stop_words, min_length: int = 3) -> bool:
+    word = token.lower_
+    return (word.isascii() and word.isalpha() and len(word) >= min_length
+            and not token.is_stop and word not in stop_words)
+
+
+def doc_terms(doc, stop_words=(), min_length: int = 3):
+    """``(tokens, entities)`` of a tagged document."""
+    tokens = [t.lower_ for t in doc if keep_token(t, stop_words, min_length)]
+    entities = [(ent.text.strip(), ent.label_) for ent in doc.ents if ent.text.strip()]
+    return tokens, entities
+
+
+# -------- Worker processes -------- #
+
+_worker_nlp = None  # the pipeline loaded by this worker process
+
+
+def _load_worker(model, disable):
+    global _worker_nlp
+    _worker_nlp = load_pipeline(model, disable)
+
+
+def _analyze_batch(texts, stop_words, min_length):
+    return [doc_terms(doc, stop_words, min_length) for doc in _worker_nlp.pipe(texts, batch_size=len(texts))]
+
+
+class NlpWorkers:
+    """
+    ``processes`` worker processes, each loading its own copy of ``model``
+    (in the background; the caller does not wait for it).
+    """
+    def __init__(self, model: str = "en_core_web_sm", processes: int = 2, disable=UNUSED_PIPES):
+        self.processes = processes
+        self.pool = ProcessPoolExecutor(processes, initializer=_load_worker, initargs=(model, disable))
+        self.pool.submit(int)  # fork the workers now, before the caller starts threads
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def analyze(nlp, items, stop_words=(), batch_size: int = 4, min_length: int = 3, workers: NlpWorkers = None):
+    """
+    Yield ``(context, tokens, entities)`` for each ``(text, context)`` in
+    ``items``, in order: lowercase alphabetic tokens that are not stopwords,
+    and the named entities as ``(text, label)`` pairs. With ``workers`` the
+    texts are tagged there and ``nlp`` is not used.
+    """
+    if workers is None:
+        for doc, context in nlp.pipe(items, as_tuples=True, batch_size=batch_size):
+            yield (context, *doc_terms(doc, stop_words, min_length))
+        return
+    stop_words = frozenset(stop_words)
+    items = iter(items)
+    running = deque()  # (future, contexts), in input order
+    while True:
+        batch = list(islice(items, batch_size))
+        if batch:
+            future = workers.pool.submit(_analyze_batch, [text for text, _ in batch], stop_words, min_length)
+            running.append((future, [context for _, context in batch]))
+        # Hand on every finished batch at the head; wait only when enough are in flight
+        while running and (not batch or running[0][0].done() or len(running) >= 2 * workers.processes):
+            future, contexts = running.popleft()
+            for context, (tokens, entities) in zip(contexts, future.result()):
+                yield context, tokens, entities
+        if not batch:
+            return
+
+
+class EntityIndex:
+    """Which documents mention each named entity."""
+    def __init__(self):
+        self.documents = []
+        self.postings = {}  # (text, label) -> [document numbers, ascending]
+
+    def add(self, document: str, entities):
+        doc_id = len(self.documents)
+        self.documents.append(document)
+        for key in dict.fromkeys(entities):
+            self.postings.setdefault(key, []).append(doc_id)
+        return doc_id
+
+    def lookup(self, text: str, label: str = None):
+        """Documents mentioning ``text`` (as any label unless ``label`` is given)."""
+        ids = set()
+        for (ent, ent_label), postings in self.postings.items():
+            if ent == text and label in (None, ent_label):
+                ids.update(postings)
+        return [self.documents[i] for i in sorted(ids)]
+
+    def most_common(self, n: int = None):
+        """``((text, label), document count)``, most widespread entities first."""
+        ranked = sorted(self.postings.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+        return [(key, len(postings)) for key, postings in ranked[:n]]
+
+    def save(self, path: str):
+        by_label = {}
+        for (text, label), postings in sorted(self.postings.items()):
+            by_label.setdefault(label, {})[text] = postings
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"documents": self.documents, "entities": by_label}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "EntityIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls()
+        index.documents = data["documents"]
+        for label, entities in data["entities"].items():
+            for text, postings in entities.items():
+                index.postings[(text, label)] = postings
+        return index
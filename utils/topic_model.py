@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+An LDA topic model that persists between runs and learns from new documents only.
+
+``<dir>`` holds
+
+  - ``dictionary.gensim``, ``lda.gensim``: the gensim dictionary and model
+  - ``trained.tsv``: ``doc<TAB>digest`` of every document the model has seen
+  - ``pending.jsonl``: bag-of-words documents added since the last training,
+    so a crashed run's documents are still trained on by the next one
+  - ``trace.jsonl``: per training pass, the seconds it took and the
+    perplexity on a sample of the documents
+
+The first ``refresh()`` trains for ``passes`` passes over the pending
+documents. Later refreshes feed only the new ones to the saved model by
+online variational Bayes (Hoffman et al. 2010, gensim's ``update``), for
+``update_passes`` passes. A refresh therefore costs time in proportion to
+the new documents, not the whole corpus. The vocabulary is fixed once a
+model exists, since a trained model cannot take new words, so words first
+seen later are dropped. Delete the directory to retrain from scratch.
+
+With ``workers > 1`` training uses ``LdaMulticore``, which runs the E-step
+on ``workers`` processes.
+
+gensim is only imported, and the saved model and dictionary loaded, by the
+first ``add()`` or ``refresh()``; ``is_new()`` reads ``trained.tsv`` only.
+
+    topics = TopicModel("wiki_topics", num_topics=5, workers=4)
+    if topics.is_new(name, digest):
+        topics.add(name, digest, tokens)
+    lda = topics.refresh()
+"""
+
+import json
+import math
+import os
+import time
+from itertools import islice
+
+EVAL_DOCS = 500  # documents the perplexity is measured on
+
+
+class BowCorpus:
+    """Bag-of-words documents in a JSON-lines file, read back on every pass."""
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.count = sum(1 for _ in f)
+
+    def add(self, fp, bow, **fields):
+        fp.write(json.dumps(dict(fields, bow=bow)) + "\n")
+        self.count += 1
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __iter__(self):
+        for record in self.records():
+            yield [tuple(pair) for pair in record["bow"]]
+
+    def __len__(self):
+        return self.count
+
+
+class TopicModel:
+    def __init__(self, directory: str, num_topics: int, workers: int = 1,
+                 passes: int = 10, update_passes: int = 1, chunksize: int = 2000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_topics = num_topics
+        self.workers = workers
+        self.passes = passes
+        self.update_passes = update_passes
+        self.chunksize = chunksize
+        self.dictionary_path = os.path.join(directory, "dictionary.gensim")
+        self.model_path = os.path.join(directory, "lda.gensim")
+        self.trained_path = os.path.join(directory, "trained.tsv")
+        self.trace_path = os.path.join(directory, "trace.jsonl")
+        pending_path = os.path.join(directory, "pending.jsonl")
+
+        self.model = self.dictionary = None  # loaded by _load()
+        if not os.path.exists(self.model_path) and os.path.exists(pending_path):
+            # Without a model the vocabulary is still growing and was never saved,
+            # so documents left pending by a crashed first run are counted again
+            os.remove(pending_path)
+        self.pending = BowCorpus(pending_path)
+
+        self.trained = {}
+        if os.path.exists(self.trained_path):
+            with open(self.trained_path, encoding="utf-8") as f:
+                for line in f:
+                    doc, _, digest = line.rstrip("\n").partition("\t")
+                    self.trained[doc] = digest
+        for record in self.pending.records():
+            self.trained[record["doc"]] = record["digest"]
+        self.pending_fp = open(self.pending.path, "a", encoding="utf-8")
+
+    def _load(self):
+        """Import gensim and load the saved model and dictionary, or start a new dictionary."""
+        if self.dictionary is not None:
+            return
+        from gensim import corpora, models  # optional dependency
+
+        if os.path.exists(self.model_path):
+            self.model = models.LdaModel.load(self.model_path)
+            if isinstance(self.model, models.LdaMulticore) and self.workers > 1:
+                self.model.workers = self.workers
+            self.dictionary = corpora.Dictionary.load(self.dictionary_path)
+        else:
+            self.dictionary = corpora.Dictionary()
+
+    def is_new(self, doc: str, digest: str) -> bool:
+        """Whether ``doc`` is unknown to the model or has changed since it was trained on."""
+        return self.trained.get(doc) != digest
+
+    def add(self, doc: str, digest: str, tokens):
+        """Queue a document for the next ``refresh()``."""
+        self._load()
+        bow = self.dictionary.doc2bow(tokens, allow_update=self.model is None)
+        self.pending.add(self.pending_fp, bow, doc=doc, digest=digest)
+        self.trained[doc] = digest
+
+    def refresh(self, log=print):
+        """
+        Train on the pending documents (from scratch when there is no model
+        yet, else online) and save. Returns the model, or None when there
+        is neither a model nor anything to train on.
+        """
+        from gensim import models  # optional dependency
+
+        self._load()
+        self.pending_fp.flush()
+        if not len(self.pending):
+            return self.model
+        first = self.model is None
+        if first:
+            self.dictionary.save(self.dictionary_path)
+            cls = models.LdaMulticore if self.workers > 1 else models.LdaModel
+            kwargs = dict(workers=self.workers) if self.workers > 1 else {}
+            self.model = cls(num_topics=self.num_topics, id2word=self.dictionary,
+                             chunksize=self.chunksize, **kwargs)
+        passes = self.passes if first else self.update_passes
+        sample = list(islice(self.pending, EVAL_DOCS))
+        words = sum(n for doc in sample for _, n in doc)
+
+        with open(self.trace_path, "a", encoding="utf-8") as trace:
+            for p in range(1, passes + 1):
+                t0 = time.perf_counter()
+                self.model.update(self.pending)
+                seconds = time.perf_counter() - t0
+                perplexity = 2 ** -self.model.log_perplexity(sample, total_docs=len(self.pending)) \
+                    if words else math.nan
+                entry = {"time": time.time(), "mode": "train" if first else "update", "pass": p,
+                         "docs": len(self.pending), "seconds": round(seconds, 3),
+                         "perplexity": round(perplexity, 2)}
+                trace.write(json.dumps(entry) + "\n")
+                log(f"   LDA {entry['mode']} pass {p}/{passes}: {entry['docs']} docs, "
+                    f"{seconds:.1f}s, perplexity {perplexity:.1f}")
+
+        self.model.save(self.model_path)
+        with open(self.trained_path, "a", encoding="utf-8") as f:
+            for record in self.pending.records():
+                f.write(f"{record['doc']}\t{record['digest']}\n")
+        self.pending_fp.close()
+        os.remove(self.pending.path)
+        self.pending = BowCorpus(self.pending.path)
+        self.pending_fp = open(self.pending.path, "a", encoding="utf-8")
+        return self.model
+
+    def close(self):
+        self.pending_fp.close()
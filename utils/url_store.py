@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-compact frontier and dedup sets for large crawls.
+
+Articles are identified by their title key, the path after ``/wiki/``
+stored as UTF-8 bytes, instead of the full ``https://.../wiki/...`` string.
+
+  - ExactSeen:      a set of title keys (no false positives)
+  - BloomSeen:      fixed-size Bloom filter, ~1.8 bytes/URL at 0.1% false positives
+  - PackedFrontier: FIFO of (key, depth) packed into chunks, where full chunks
+                    can spill to disk once a memory budget is used up
+  - PriorityFrontier: best-first queue scored by in-links and term overlap
+                    with the start topic
+  - HostFrontier:   one of the above per wiki host, served round robin, for
+                    crawls of several wikis at once
+
+``python -m benchmarks.bench_memory`` measures bytes per discovered URL.
+"""
+
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import re
+import struct
+from array import array
+from collections import deque
+from urllib.parse import unquote
+
+
+class ExactSeen:
+    def __init__(self):
+        self.keys = set()
+
+    def add(self, key: bytes):
+        self.keys.add(key)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class BloomSeen:
+    """
+    Bloom filter sized for ``capacity`` keys at ``error_rate``.
+
+    A false positive means a never-seen article is treated as seen and
+    skipped; it can never cause a page to be fetched twice.
+    """
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.m = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def add(self, key: bytes):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def make_seen(mode: str = "exact", capacity: int = 10_000_000, error_rate: float = 0.001):
+    if mode == "bloom":
+        return BloomSeen(capacity, error_rate)
+    return ExactSeen()
+
+
+class _Chunk:
+    """Newline-separated keys in one bytearray plus their depths."""
+    __slots__ = ("data", "depths", "pos", "read")
+
+    def __init__(self, data=None, depths=None):
+        self.data = data if data is not None else bytearray()
+        self.depths = depths if depths is not None else array("B")
+        self.pos = 0
+        self.read = 0
+
+    def append(self, key: bytes, depth: int):
+        self.data += key
+        self.data += b"\n"
+        self.depths.append(min(depth, 255))
+
+    def pop(self):
+        end = self.data.index(b"\n", self.pos)
+        key = bytes(self.data[self.pos:end])
+        self.pos = end + 1
+        depth = self.depths[self.read]
+        self.read += 1
+        return key, depth
+
+    def __len__(self) -> int:
+        return len(self.depths) - self.read
+
+
+class PackedFrontier:
+    """
+    FIFO of ``(key, depth)`` pairs.
+
+    Entries are packed ``chunk_entries`` at a time. With ``spill_dir`` set,
+    every full chunk beyond ``mem_chunks`` is written to disk and read back
+    when the queue reaches it, so memory stays bounded for any frontier size.
+    """
+    def __init__(self, chunk_entries: int = 65536, mem_chunks: int = 8, spill_dir: str = None):
+        self.chunk_entries = chunk_entries
+        self.mem_chunks = mem_chunks
+        self.spill_dir = spill_dir
+        self.chunks = deque()  # _Chunk in memory, or str path of a spilled chunk
+        self.size = 0
+        self.spilled = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def append(self, key: bytes, depth: int):
+        tail = self.chunks[-1] if self.chunks else None
+        if not isinstance(tail, _Chunk) or len(tail.depths) >= self.chunk_entries:
+            if isinstance(tail, _Chunk):
+                self._maybe_spill()
+            tail = _Chunk()
+            self.chunks.append(tail)
+        tail.append(key, depth)
+        self.size += 1
+
+    def _maybe_spill(self):
+        # The chunk that just filled up is the last one to be read, so it goes first
+        if not self.spill_dir or len(self.chunks) <= 1:
+            return
+        in_memory = sum(1 for c in self.chunks if isinstance(c, _Chunk))
+        if in_memory <= self.mem_chunks:
+            return
+        chunk = self.chunks.pop()
+        path = os.path.join(self.spill_dir, f"frontier-{self.spilled:08d}.bin")
+        with open(path, "wb") as f:
+            f.write(struct.pack("<I", len(chunk.depths)))
+            f.write(chunk.depths.tobytes())
+            f.write(chunk.data)
+        self.spilled += 1
+        self.chunks.append(path)
+
+    @staticmethod
+    def _load(path: str) -> _Chunk:
+        with open(path, "rb") as f:
+            (n,) = struct.unpack("<I", f.read(4))
+            depths = array("B")
+            depths.frombytes(f.read(n))
+            data = bytearray(f.read())
+        os.remove(path)
+        return _Chunk(data, depths)
+
+    def popleft(self):
+        while self.chunks:
+            head = self.chunks[0]
+            if isinstance(head, str):
+                head = self.chunks[0] = self._load(head)
+            if len(head):
+                self.size -= 1
+                return head.pop()
+            self.chunks.popleft()
+        raise IndexError("pop from an empty frontier")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+
+HOST_SEP = b"|"  # cannot occur in a MediaWiki title
+TERM_RE = re.compile(r"[^\W_]+")
+STOP_TERMS = frozenset("a an and by for from in of on or the to with".split())
+
+
+def title_terms(title) -> frozenset:
+    """Lower-case words of an article title, title key or /wiki/ URL."""
+    if isinstance(title, bytes):
+        title = title.decode("utf-8", "replace")
+    title = unquote(title.rsplit("/wiki/", 1)[-1].rsplit(HOST_SEP.decode(), 1)[-1])
+    return frozenset(t for t in TERM_RE.findall(title.lower()) if t not in STOP_TERMS)
+
+
+class PriorityFrontier:
+    """
+    Best-first queue of ``(key, depth)`` pairs.
+
+    An entry's score is the number of crawled pages linking to it plus
+    ``topic_weight`` times the share of the start topic's terms found in its
+    title. Scores only grow, so updates push a fresh heap entry and stale
+    ones are skipped when popped (and compacted away when they pile up).
+    Ties go to the shallower, then the earlier discovered entry.
+    """
+    def __init__(self, topic: str, topic_weight: float = 5.0):
+        self.topic = title_terms(topic)
+        self.topic_weight = topic_weight
+        self.heap = []
+        self.pending = {}  # key -> [in_links, depth, relevance, seq]
+        self.seq = itertools.count()
+
+    def relevance(self, key) -> float:
+        if not self.topic:
+            return 0.0
+        return self.topic_weight * len(self.topic & title_terms(key)) / len(self.topic)
+
+    def _push(self, key, entry):
+        in_links, depth, relevance, seq = entry
+        heapq.heappush(self.heap, (-(in_links + relevance), depth, seq, key))
+        if len(self.heap) > 2 * len(self.pending) + 1024:
+            self._compact()
+
+    def _compact(self):
+        self.heap = [(-(e[0] + e[2]), e[1], e[3], k) for k, e in self.pending.items()]
+        heapq.heapify(self.heap)
+
+    def append(self, key, depth: int, in_links: int = 1):
+        """Queue a newly discovered key, or count one more in-link if it is already queued."""
+        if key in self.pending:
+            self.add_link(key, depth)
+            return
+        entry = self.pending[key] = [in_links, depth, self.relevance(key), next(self.seq)]
+        self._push(key, entry)
+
+    def add_link(self, key, depth: int = None) -> bool:
+        """One more crawled page links to ``key``; False if it is not queued (any more)."""
+        entry = self.pending.get(key)
+        if entry is None:
+            return False
+        entry[0] += 1
+        if depth is not None and depth < entry[1]:
+            entry[1] = depth
+        self._push(key, entry)
+        return True
+
+    def popleft(self):
+        """Highest-scoring ``(key, depth)``; named like PackedFrontier's so they are interchangeable."""
+        while self.heap:
+            neg_score, depth, _seq, key = heapq.heappop(self.heap)
+            entry = self.pending.get(key)
+            if entry is None or -neg_score != entry[0] + entry[2] or depth != entry[1]:
+                continue  # stale
+            del self.pending[key]
+            return key, depth
+        raise IndexError("pop from an empty frontier")
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __bool__(self) -> bool:
+        return bool(self.pending)
+
+
+class HostFrontier:
+    """
+    One queue per wiki host, with the interface of the single queues.
+
+    The first host's keys are plain title keys; other hosts' keys are
+    ``b"<netloc>|<title key>"``. ``make_queue(host)`` builds a host's queue
+    (a PackedFrontier or PriorityFrontier) on first use. ``popleft`` takes
+    the hosts in turn, skipping any with ``workers / active hosts`` pages
+    already in flight, so a slow or rate-limited host only ties up its share
+    of the workers; it returns None when every host with queued pages is at
+    that share. Call ``release(key)`` when a popped page is done. A crawl of
+    one host is never held back.
+    """
+    def __init__(self, make_queue, workers: int):
+        self.make_queue = make_queue
+        self.workers = workers
+        self.queues = {}  # host ("" for the first) -> queue
+        self.in_flight = {}
+        self.turn = 0
+
+    @staticmethod
+    def host_of(key: bytes) -> str:
+        i = key.find(HOST_SEP)
+        return key[:i].decode("utf-8") if i >= 0 else ""
+
+    def queue(self, host: str):
+        q = self.queues.get(host)
+        if q is None:
+            q = self.queues[host] = self.make_queue(host)
+            self.in_flight[host] = 0
+        return q
+
+    def append(self, key: bytes, depth: int, *args):
+        self.queue(self.host_of(key)).append(key, depth, *args)
+
+    def add_link(self, key: bytes, depth: int = None) -> bool:
+        return self.queue(self.host_of(key)).add_link(key, depth)
+
+    def popleft(self):
+        hosts = list(self.queues)
+        active = sum(1 for h in hosts if self.queues[h] or self.in_flight[h])
+        share = math.ceil(self.workers / active) if active > 1 else math.inf
+        for step in range(len(hosts)):
+            host = hosts[(self.turn + step) % len(hosts)]
+            if self.queues[host] and self.in_flight[host] < share:
+                self.turn = (self.turn + step + 1) % len(hosts)
+                self.in_flight[host] += 1
+                return self.queues[host].popleft()
+        if not self:
+            raise IndexError("pop from an empty frontier")
+        return None
+
+    def release(self, key: bytes):
+        host = self.host_of(key)
+        if self.in_flight.get(host):
+            self.in_flight[host] -= 1
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def __bool__(self) -> bool:
+        return any(self.queues.values())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming article reader for Wikipedia ``pages-articles`` XML dumps.
+
+A ``*-multistream.xml.bz2`` dump is a concatenation of independent bz2
+streams of ~100 pages each. Streams are cut apart using the dump's
+``*-multistream-index.txt.bz2`` when given, or by scanning for the bz2
+stream header otherwise. They are then decompressed, parsed and converted
+to plain paragraphs (utils/wikitext.py) in a process pool. At most
+``2 * procs`` streams are in flight, so memory does not grow with the dump.
+A single-stream ``.bz2`` or plain ``.xml`` dump is read with ``iterparse``
+and only the wikitext conversion is parallel.
+
+Only main-namespace, non-redirect pages whose titles pass the scraper's
+``BAD_PREFIXES`` filter are returned, in dump order.
+
+    for title, body, links in iter_dump_articles("enwiki-latest-pages-articles-multistream.xml.bz2"):
+        ...
+"""
+
+import bz2
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.wiki_extract import clean_body, is_article_href
+from utils.wikitext import parse_wikitext, title_href
+
+STREAM_MAGIC_RE = re.compile(rb"BZh[1-9]1AY&SY")  # stream header + first block magic
+PAGE_RE = re.compile(r"<page>.*?</page>", re.DOTALL)
+READ_BYTES = 8 * 1024 * 1024
+PROBE_BYTES = 64 * 1024 * 1024  # the first stream (siteinfo only) is far smaller
+PAGES_PER_TASK = 200
+
+
+# -------- Splitting -------- #
+
+def is_multistream(path: str) -> bool:
+    """True if a second bz2 stream starts within the first PROBE_BYTES."""
+    if not path.endswith(".bz2"):
+        return False
+    with open(path, "rb") as f:
+        tail = b""
+        read = 0
+        while read < PROBE_BYTES:
+            block = f.read(READ_BYTES)
+            if not block:
+                return False
+            buf = tail + block
+            start = 1 if read == 0 else 0
+            if STREAM_MAGIC_RE.search(buf, start):
+                return True
+            read += len(block)
+            tail = buf[-9:]
+    return False
+
+
+def iter_streams_scan(path: str):
+    """Raw compressed streams, cut at every bz2 stream header."""
+    with open(path, "rb") as f:
+        buf = b""
+        searched = 1
+        while True:
+            block = f.read(READ_BYTES)
+            buf += block
+            while True:
+                m = STREAM_MAGIC_RE.search(buf, searched)
+                if not m:
+                    break
+                yield buf[:m.start()]
+                buf = buf[m.start():]
+                searched = 1
+            if not block:
+                if buf:
+                    yield buf
+                return
+            searched = max(1, len(buf) - 9)
+
+
+def iter_streams_index(path: str, index_path: str):
+    """Raw compressed streams at the offsets listed in a multistream index."""
+    with bz2.open(index_path, "rt", encoding="utf-8") as idx, open(path, "rb") as f:
+        prev = None
+        for line in idx:
+            offset = int(line.split(":", 1)[0])
+            if offset == prev:
+                continue
+            if prev is None:
+                if offset:
+                    yield f.read(offset)  # the siteinfo stream before the first page
+            else:
+                yield f.read(offset - prev)
+            prev = offset
+        rest = f.read()
+        if rest:
+            yield rest
+
+
+# -------- Page parsing (runs in the pool) -------- #
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _page_fields(page: ET.Element):
+    title = ns = text = ""
+    redirect = False
+    for el in page.iter():
+        name = _local(el.tag)
+        if name == "title":
+            title = el.text or ""
+        elif name == "ns":
+            ns = el.text or ""
+        elif name == "redirect":
+            redirect = True
+        elif name == "text":
+            text = el.text or ""
+    return title, ns, redirect, text
+
+
+def convert_pages(pages):
+    """``[(title, body, links)]`` for the article pages among ``(title, ns, redirect, text)``."""
+    out = []
+    for title, ns, redirect, text in pages:
+        if ns != "0" or redirect or not is_article_href(title_href(title)):
+            continue
+        paragraphs, links, _ = parse_wikitext(text, title)
+        body = clean_body(paragraphs)
+        if body:
+            out.append((title, body, links))
+    return out
+
+
+def convert_stream(data: bytes):
+    text = bz2.decompress(data).decode("utf-8")
+    pages = [_page_fields(ET.fromstring(m.group(0))) for m in PAGE_RE.finditer(text)]
+    return convert_pages(pages)
+
+
+def iter_page_batches(path: str, size: int = PAGES_PER_TASK):
+    """``(title, ns, redirect, text)`` lists from a single-stream or uncompressed dump."""
+    opener = bz2.open if path.endswith(".bz2") else open
+    batch = []
+    with opener(path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _event, root = next(context)
+        for event, el in context:
+            if event != "end" or _local(el.tag) != "page":
+                continue
+            batch.append(_page_fields(el))
+            root.clear()  # drop finished pages so memory stays flat
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+# -------- Driver -------- #
+
+def iter_dump_articles(path: str, procs: int = None, index_path: str = None):
+    """Yield ``(title, body, links)`` for every article in the dump, in order."""
+    if index_path or is_multistream(path):
+        work = iter_streams_index(path, index_path) if index_path else iter_streams_scan(path)
+        task = convert_stream
+    else:
+        work = iter_page_batches(path)
+        task = convert_pages
+
+    procs = procs or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=procs)
+    backlog = 2 * procs
+    pending = deque()
+    try:
+        for item in work:
+            pending.append(pool.submit(task, item))
+            while len(pending) >= backlog:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
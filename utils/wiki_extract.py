@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Article extraction for Wikipedia HTML.
+
+Every backend parses a page into raw paragraph texts, article links and the
+title; ``finish`` then cleans the paragraphs into ``(body, links, title)``:
+
+  - ``bs4``:  the original BeautifulSoup/html.parser walk of the whole page
+  - ``lxml``: only parses the ``mw-parser-output`` subtree and the
+              ``firstHeading`` element, in C
+
+Both produce identical results on MediaWiki output (which is well-formed);
+``python -m benchmarks.bench_extract`` checks this and times them.
+"""
+
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+ARTICLE_PREFIX = "/wiki/"
+BAD_PREFIXES = (
+    "Category:", "File:", "Help:", "Portal:", "Special:", "Template:",
+    "Template_talk:", "Talk:", "Wikipedia:", "Module:", "Draft:",
+    "Book:", "TimedText:", "MediaWiki:", "Gadget:", "Gadget_definition:"
+)
+
+CITATION_RE = re.compile(r"\[\s*([0-9]+|[a-zA-Z]+|note\s*\d+)\s*\]")
+SPACE_RE = re.compile(r"\s+")
+
+
+def clean_text(text: str) -> str:
+    # Remove bracketed citation numbers [1], [12], [a], [note 1]
+    text = CITATION_RE.sub("", text)
+    # Collapse whitespace
+    text = SPACE_RE.sub(" ", text).strip()
+    return text
+
+
+def is_article_href(href: str, hosts=None) -> bool:
+    """
+    Whether ``href`` links to an article. Absolute links (another language
+    edition or sister project) count when their host is in ``hosts``, or
+    always when ``hosts`` is None, as for the extractors, whose links the
+    crawler filters again with the hosts it crawls.
+    """
+    if href and href.startswith(("//", "http://", "https://")):
+        netloc, _, path = href.split("//", 1)[1].partition("/")
+        if hosts is not None and netloc not in hosts:
+            return False
+        href = "/" + path
+    if not href or not href.startswith(ARTICLE_PREFIX):
+        return False
+    # filter out fragments and query
+    if "#" in href or "?" in href:
+        return False
+    topic = href.split(ARTICLE_PREFIX, 1)[-1]
+    # Skip non-article namespaces
+    for bad in BAD_PREFIXES:
+        if topic.startswith(bad):
+            return False
+    return True
+
+
+# -------- BeautifulSoup backend -------- #
+
+def extract_title(soup: BeautifulSoup) -> str:
+    h1 = soup.find("h1", id="firstHeading")
+    return h1.get_text(strip=True) if h1 else ""
+
+
+def parse_article_html(html: str):
+    body, links, soup = _parse_bs4(html)
+    return clean_body(body), links, soup
+
+
+def _parse_bs4(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    content = soup.find("div", class_="mw-parser-output")
+    if not content:
+        return [], [], soup
+    # Raw paragraph texts; clean_body() does the cleaning
+    paragraphs = [p.get_text() for p in content.find_all("p")]
+
+    # Collect outgoing article links
+    links = []
+    for a in content.select("a[href]"):
+        href = a.get("href")
+        if is_article_href(href):
+            links.append(href)
+    return paragraphs, links, soup
+
+
+def parse_bs4(html: str):
+    paragraphs, links, soup = _parse_bs4(html)
+    return paragraphs, links, extract_title(soup)
+
+
+def extract_bs4(html: str):
+    return finish(*parse_bs4(html))
+
+
+# -------- lxml backend -------- #
+
+CONTENT_RE = re.compile(
+    r"""<div\b[^>]*\bclass\s*=\s*["']?[^"'>]*(?<![\w-])mw-parser-output(?![\w-])""", re.IGNORECASE)
+HEADING_RE = re.compile(
+    r"""<h1\b[^>]*\bid\s*=\s*["']?firstHeading(?=["'\s/>]).*?</h1\s*>""", re.IGNORECASE | re.DOTALL)
+SKIP_TEXT = ("script", "style", "template", "rt", "rp")  # bs4's get_text() leaves these out too
+
+
+def _strings(el, parts):
+    """Collect what ``Tag.get_text()`` sees: no comments, scripts or styles."""
+    if el.text and el.tag not in SKIP_TEXT:
+        parts.append(el.text)
+    for child in el:
+        if isinstance(child.tag, str):
+            _strings(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+    return parts
+
+
+def _has_class(el, name: str) -> bool:
+    return name in (el.get("class") or "").split()
+
+
+def parse_lxml(html: str):
+    from lxml import html as lxml_html  # optional dependency
+
+    title = ""
+    m = HEADING_RE.search(html)
+    if m:
+        h1 = lxml_html.fragment_fromstring(m.group(0))
+        title = "".join(t.strip() for t in _strings(h1, []))
+
+    m = CONTENT_RE.search(html)
+    if not m:
+        return [], [], title
+    # Parse from the content div onwards; the <head>, menus and sidebar are skipped
+    root = lxml_html.document_fromstring(html[m.start():])
+    content = next((d for d in root.iter("div") if _has_class(d, "mw-parser-output")), None)
+    if content is None:
+        return [], [], title
+
+    paragraphs = ["".join(_strings(p, [])) for p in content.iter("p")]
+
+    links = []
+    for a in content.iter("a"):
+        href = a.get("href")
+        if is_article_href(href):
+            links.append(href)
+    return paragraphs, links, title
+
+
+def extract_lxml(html: str):
+    return finish(*parse_lxml(html))
+
+
+# -------- Shared -------- #
+
+def clean_body(paragraphs) -> str:
+    """Clean raw paragraph texts and join the non-empty ones."""
+    cleaned = []
+    for p in paragraphs:
+        txt = clean_text(p)
+        if txt:
+            cleaned.append(txt)
+    return "\n\n".join(cleaned)
+
+
+def finish(paragraphs, links, title):
+    return clean_body(paragraphs), links, title
+
+
+def timed_extract(parse, html: str):
+    """``(body, links, title)`` plus parse and clean seconds; picklable via functools.partial."""
+    t0 = time.perf_counter()
+    paragraphs, links, title = parse(html)
+    t1 = time.perf_counter()
+    body = clean_body(paragraphs)
+    return (body, links, title), t1 - t0, time.perf_counter() - t1
+
+
+PARSERS = {"bs4": parse_bs4, "lxml": parse_lxml}
+BACKENDS = {"bs4": extract_bs4, "lxml": extract_lxml}
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """``auto`` prefers lxml when it is installed."""
+    if name == "auto":
+        try:
+            import lxml.html  # noqa: F401
+            name = "lxml"
+        except ImportError:
+            name = "bs4"
+    return name
+
+
+def get_extractor(name: str = "auto"):
+    """Extractor callable ``html -> (body, links, title)``."""
+    return BACKENDS[resolve_backend(name)]
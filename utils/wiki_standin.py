@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for en.wikipedia.org.
+
+Serves a generated, deterministic article graph with the same
+``mw-parser-output`` / ``firstHeading`` markup the scrapers look for, so
+crawls can be exercised offline. ``/w/api.php`` answers the ``action=query``
+revisions requests of the ``--source api`` backend with the same articles
+as wikitext, splitting large batches with ``continue``; ``write_dump`` saves
+them as a multistream ``pages-articles`` dump for ``--from-dump``. With ``edits`` the HTML
+articles change over simulated days (the handler's ``day``), each at its own rate, for
+trying out ``--recrawl``. Several stand-ins can link to each other (``interwiki``) and serve
+a ``robots_txt``, for crawling several wikis with ``--hosts``. Response latency, page size and injected
+429/5xx errors are configurable for benchmarking (see benchmarks/bench_crawl.py):
+
+    python -m utils.wiki_standin --port 8000 --pages 500
+    python -m utils.wiki_standin --latency 0.05 --error-rate 0.02 --paragraphs 30
+    python -m utils.wiki_standin --pages 100000 --dump standin-pages-articles-multistream.xml.bz2
+    python "wiki scrapper.py" --topic "Topic 0" --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+ARTICLE_PREFIX = "/wiki/"
+API_PATH = "/w/api.php"
+WORDS = (
+    "learning model data algorithm network training feature statistics "
+    "theory system computer neural vector function probability method "
+    "analysis inference pattern signal language knowledge search graph"
+).split()
+
+
+def article_title(i: int) -> str:
+    return f"Topic {i}"
+
+
+def article_slug(i: int) -> str:
+    return article_title(i).replace(" ", "_")
+
+
+def edit_probability(i: int) -> float:
+    """Daily chance that article ``i`` is edited: 1/2 for every eighth article, down to 1/256."""
+    return 0.5 ** (1 + i % 8)
+
+
+def revision(i: int, day: int) -> int:
+    """How many times article ``i`` has been edited by ``day``."""
+    p = edit_probability(i)
+    return sum(random.Random(f"{i}:{d}").random() < p for d in range(1, day + 1))
+
+
+def render_article(i: int, pages: int, links_per_page: int = 20, paragraphs: int = 6,
+                   aliases: bool = False, mirror: bool = False, rev: int = 0, interwiki=()) -> str:
+    """
+    Build the HTML for article ``i``; the same ``i`` always yields the same page.
+
+    With ``aliases`` every fifth article also links to a redirect and a
+    mirror of another one; ``mirror`` renders the mirror: the same text
+    under another title, with a word changed and a footer added. A
+    ``rev`` above 0 adds an edited sentence. ``interwiki`` base URLs get an
+    absolute link each, to the article of the same number there.
+    """
+    rnd = random.Random(i)
+    targets = [rnd.randrange(pages) for _ in range(links_per_page)]
+    title = f"{article_title(i)} (mirror)" if mirror else article_title(i)
+    out = [
+        "<!DOCTYPE html><html><head><title>", title, " - Wikipedia</title></head><body>",
+        '<div id="mw-navigation"><a href="/wiki/Main_Page">Main page</a></div>',
+        '<h1 id="firstHeading" class="firstHeading"><span>', title, "</span></h1>",
+        '<div id="mw-content-text"><div class="mw-parser-output">',
+        '<table class="infobox"><tr><td><a href="/wiki/File:Example.png">image</a></td></tr></table>',
+    ]
+    for p in range(paragraphs):
+        words = " ".join(rnd.choice(WORDS) for _ in range(60))
+        if mirror and p == 0:
+            words = "mirrored " + words.split(" ", 1)[1]
+        links = "".join(
+            f' <a href="{ARTICLE_PREFIX}{article_slug(t)}" title="{article_title(t)}">{article_title(t)}</a>'
+            for t in targets[p::paragraphs]
+        )
+        out.append(f"<p>{words}<sup>[{p + 1}]</sup>{links}.</p>")
+    if aliases and i % 5 == 0 and targets:
+        t = targets[0]
+        out.append(f'<p>See also <a href="{ARTICLE_PREFIX}Topic_alias_{t}">an alias</a> and '
+                   f'<a href="{ARTICLE_PREFIX}Topic_mirror_{t}">a mirror</a>.</p>')
+    if mirror:
+        out.append("<p>This page is mirrored from another article.</p>")
+    if rev:
+        out.append(f"<p>This article was last edited in revision {rev}.</p>")
+    if interwiki:
+        links = "".join(f' <a href="{other}{ARTICLE_PREFIX}{article_slug(i)}" class="extiw">{other}</a>'
+                        for other in interwiki)
+        out.append(f"<p>In other wikis:{links}</p>")
+    out.append("<p>\n</p>")
+    out.append(f'<a href="{ARTICLE_PREFIX}Category:Generated">Category</a>')
+    out.append(f'<a href="{ARTICLE_PREFIX}{article_slug(i)}#History">section</a>')
+    out.append("</div></div></body></html>")
+    return "".join(out)
+
+
+def render_wikitext(i: int, pages: int, links_per_page: int = 20, paragraphs: int = 6) -> str:
+    """Wikitext of article ``i``: the text and links of ``render_article`` plus some markup to strip."""
+    rnd = random.Random(i)
+    targets = [rnd.randrange(pages) for _ in range(links_per_page)]
+    out = [
+        "{{Short description|Generated article}}\n",
+        "{{Infobox topic\n| name = %s\n| image = Example.png\n}}\n" % article_title(i),
+    ]
+    for p in range(paragraphs):
+        words = " ".join(rnd.choice(WORDS) for _ in range(60))
+        links = "".join(f" [[{article_title(t)}]]" for t in targets[p::paragraphs])
+        out.append(f"{words}<ref>Source {p + 1}</ref>{links}.\n\n")
+        if p == 0:
+            out.append("== Details ==\n")
+    out.append("[[Category:Generated]]\n")
+    return "".join(out)
+
+
+def write_dump(path: str, pages: int, links_per_page: int = 20, paragraphs: int = 6,
+               per_stream: int = 100, index_path: str = None):
+    """
+    Write the articles as a ``pages-articles-multistream.xml.bz2`` dump: a
+    siteinfo stream, then one bz2 stream per ``per_stream`` pages, plus the
+    matching ``offset:id:title`` index when ``index_path`` is given. Every
+    tenth article also gets a redirect page and a Talk page, which readers
+    should skip.
+    """
+    xmlns = "http://www.mediawiki.org/xml/export-0.10/"
+    entries = []
+    for i in range(pages):
+        text = render_wikitext(i, pages, links_per_page, paragraphs)
+        entries.append((article_title(i), 0, None, text))
+        if i % 10 == 0:
+            entries.append((f"Topic alias {i}", 0, article_title(i), f"#REDIRECT [[{article_title(i)}]]"))
+            entries.append((f"Talk:{article_title(i)}", 1, None, "Discussion."))
+
+    index = []
+    with open(path, "wb") as f:
+        head = (f'<mediawiki xmlns="{xmlns}" version="0.10" xml:lang="en">\n'
+                "  <siteinfo><sitename>Stand-in</sitename></siteinfo>\n")
+        f.write(bz2.compress(head.encode("utf-8")))
+        for start in range(0, len(entries), per_stream):
+            offset = f.tell()
+            chunk = []
+            for n, (title, ns, target, text) in enumerate(entries[start:start + per_stream], start + 1):
+                redirect = f'    <redirect title="{escape(target)}" />\n' if target else ""
+                chunk.append(
+                    f"  <page>\n    <title>{escape(title)}</title>\n    <ns>{ns}</ns>\n    <id>{n}</id>\n"
+                    f"{redirect}    <revision>\n      <id>{n}</id>\n"
+                    f'      <text bytes="{len(text)}" xml:space="preserve">{escape(text)}</text>\n'
+                    "    </revision>\n  </page>\n")
+                index.append(f"{offset}:{n}:{title}\n")
+            f.write(bz2.compress("".join(chunk).encode("utf-8")))
+        f.write(bz2.compress(b"</mediawiki>\n"))
+    if index_path:
+        with bz2.open(index_path, "wt", encoding="utf-8") as f:
+            f.writelines(index)
+
+
+def topic_index(title: str, pages: int):
+    """``i`` for ``Topic i`` / ``Topic_i``, or None if there is no such article."""
+    prefix = "Topic_"
+    title = title.replace(" ", "_")
+    if not title.startswith(prefix):
+        return None
+    try:
+        i = int(title[len(prefix):])
+    except ValueError:
+        return None
+    return i if 0 <= i < pages else None
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    pages = 100
+    links_per_page = 20
+    paragraphs = 6
+    latency = 0.0          # seconds added to every response
+    latency_jitter = 0.0   # plus up to this much, uniformly
+    error_rate = 0.0       # share of requests answered with 429 or 503
+    retry_after = None     # Retry-After sent with injected 429s
+    api_pages_per_response = 20  # larger API batches are continued
+    aliases = False              # serve (and link to) Topic_alias_N redirects and Topic_mirror_N copies
+    edits = False                # articles change as ``day`` advances (see ``revision``)
+    day = 0
+    interwiki = ()               # base URLs of other wikis to link to
+    robots_txt = None            # served at /robots.txt when set, else 404
+    rnd = random.Random(0)
+    rnd_lock = threading.Lock()
+
+    def _inject(self) -> bool:
+        """Sleep for the configured latency; answer with an error instead, sometimes."""
+        with self.rnd_lock:
+            wait = self.latency + self.rnd.random() * self.latency_jitter
+            roll = self.rnd.random()
+            status = 429 if self.rnd.random() < 0.5 else 503
+        if wait:
+            time.sleep(wait)
+        if roll >= self.error_rate:
+            return False
+        self.send_response(status)
+        if status == 429 and self.retry_after is not None:
+            self.send_header("Retry-After", str(self.retry_after))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def do_GET(self):
+        if self._inject():
+            return
+        if urlsplit(self.path).path == API_PATH:
+            self._api()
+            return
+        if self.path == "/robots.txt" and self.robots_txt is not None:
+            body = self.robots_txt.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        path = unquote(self.path)
+        title = path[len(ARTICLE_PREFIX):] if path.startswith(ARTICLE_PREFIX) else ""
+        mirror = False
+        if self.aliases and title.startswith(("Topic_alias_", "Topic_mirror_")):
+            # A redirect is served as its target, like Wikipedia does; a mirror is a near-copy
+            mirror = title.startswith("Topic_mirror_")
+            title = "Topic_" + title.rsplit("_", 1)[-1]
+        i = topic_index(title, self.pages)
+        if i is None:
+            self.send_error(404)
+            return
+        # Pages only change with edits, so the ETag only depends on what was generated
+        rev = revision(i, self.day) if self.edits else 0
+        etag = f'"{i}-{self.pages}-{self.links_per_page}-{self.paragraphs}-{int(self.aliases)}{int(mirror)}-{rev}-{len(self.interwiki)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data = render_article(i, self.pages, self.links_per_page, self.paragraphs,
+                              self.aliases, mirror, rev, self.interwiki).encode("utf-8")
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _api(self):
+        """``action=query&prop=revisions`` with formatversion=2, normalisation and continuation."""
+        params = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        if params.get("action") != "query" or "titles" not in params:
+            self._json({"error": {"code": "badparams", "info": "Only action=query&titles=... is served"}})
+            return
+        titles = params["titles"].split("|")
+        query = {"normalized": [], "pages": []}
+        for t in titles:
+            if "_" in t:
+                query["normalized"].append({"from": t, "to": t.replace("_", " ")})
+        skip = int(params.get("rvcontinue", 0))
+        served, next_skip = 0, None
+        for n, t in enumerate(dict.fromkeys(t.replace("_", " ") for t in titles)):
+            i = topic_index(t, self.pages)
+            if i is None:
+                query["pages"].append({"ns": 0, "title": t, "missing": True})
+                continue
+            page = {"pageid": i + 1, "ns": 0, "title": t}
+            if n >= skip:
+                if served < self.api_pages_per_response:
+                    text = render_wikitext(i, self.pages, self.links_per_page, self.paragraphs)
+                    page["revisions"] = [{"slots": {"main": {"contentmodel": "wikitext", "content": text}}}]
+                    served += 1
+                elif next_skip is None:
+                    next_skip = n
+            query["pages"].append(page)
+        if not query["normalized"]:
+            del query["normalized"]
+        data = {"batchcomplete": True, "query": query}
+        if next_skip is not None:
+            del data["batchcomplete"]
+            data["continue"] = {"rvcontinue": str(next_skip), "continue": "||"}
+        self._json(data)
+
+    def _json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep crawl output readable
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, pages: int = 100,
+                links_per_page: int = 20, paragraphs: int = 6, latency: float = 0.0,
+                latency_jitter: float = 0.0, error_rate: float = 0.0, retry_after=None,
+                seed: int = 0, aliases: bool = False, edits: bool = False, interwiki=(),
+                robots_txt: str = None) -> ThreadingHTTPServer:
+    handler = type("Handler", (StandinHandler,), {
+        "pages": pages, "links_per_page": links_per_page, "paragraphs": paragraphs,
+        "latency": latency, "latency_jitter": latency_jitter, "error_rate": error_rate,
+        "retry_after": retry_after, "rnd": random.Random(seed), "rnd_lock": threading.Lock(),
+        "aliases": aliases, "edits": edits, "interwiki": tuple(interwiki), "robots_txt": robots_txt,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+@contextmanager
+def serve(**kwargs):
+    """Run a stand-in server on a background thread and yield its base URL."""
+    server = make_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a generated Wikipedia stand-in locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pages", type=int, default=100, help="Number of generated articles")
+    parser.add_argument("--links", type=int, default=20, help="Article links per page")
+    parser.add_argument("--paragraphs", type=int, default=6,
+                        help="Paragraphs per page, ~500 bytes each (default: 6)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--latency-jitter", type=float, default=0.0,
+                        help="Up to this many extra seconds per response, uniformly")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with 429 or 503 (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=None,
+                        help="Retry-After seconds sent with injected 429s (default: none)")
+    parser.add_argument("--aliases", action="store_true",
+                        help="Also serve and link to redirect (Topic_alias_N) and mirror (Topic_mirror_N) pages")
+    parser.add_argument("--dump", default=None, metavar="PATH",
+                        help="Write the articles as a multistream .xml.bz2 dump (plus PATH's "
+                             "-index.txt.bz2) instead of serving them")
+    args = parser.parse_args()
+
+    if args.dump:
+        index_path = args.dump.replace(".xml.bz2", "-index.txt.bz2")
+        write_dump(args.dump, args.pages, args.links, args.paragraphs, index_path=index_path)
+        print(f"Wrote {args.pages} articles to {args.dump} (index: {index_path})")
+        return
+
+    server = make_server(args.host, args.port, args.pages, args.links, args.paragraphs,
+                         args.latency, args.latency_jitter, args.error_rate, args.retry_after,
+                         aliases=args.aliases)
+    print(f"Serving {args.pages} articles on http://{args.host}:{args.port}{ARTICLE_PREFIX}Topic_0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
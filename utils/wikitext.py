@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plain paragraphs and article links from raw MediaWiki wikitext.
+
+Used where pages arrive as wikitext instead of rendered HTML (the MediaWiki
+API backend and XML dumps). Templates, tables, references, files and
+categories are dropped; headings, lists and table rows are not paragraphs,
+matching what the HTML extractors take from ``<p>`` elements. Templates
+are not expanded, so infobox/navbox text and links only appear where they
+are written out in the page itself.
+
+    paragraphs, links, title = parse_wikitext(text, title="Machine learning")
+"""
+
+import html
+import re
+from urllib.parse import quote
+
+from utils.wiki_extract import ARTICLE_PREFIX, BAD_PREFIXES
+
+# Namespaces and pseudo-namespaces whose [[links]] are not articles
+SKIP_NAMESPACES = frozenset(p[:-1].lower() for p in BAD_PREFIXES) | {
+    "image", "media", "user", "user talk", "file talk", "category talk", "wp", "wikt", "w",
+}
+MEDIA_START_RE = re.compile(r"\[\[\s*(?:File|Image|Media|Category)\s*:", re.IGNORECASE)
+COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+REF_RE = re.compile(r"<ref\b[^>/]*/>|<ref\b[^>]*>.*?</ref\s*>", re.DOTALL | re.IGNORECASE)
+SKIP_TAG_RE = re.compile(
+    r"<(math|gallery|timeline|syntaxhighlight|source|score|graph|templatedata)\b.*?</\1\s*>",
+    re.DOTALL | re.IGNORECASE)
+TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+LINK_RE = re.compile(r"\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]")
+EXTERNAL_RE = re.compile(r"\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]")
+QUOTES_RE = re.compile(r"'{2,}")
+MAGIC_RE = re.compile(r"__[A-Z]+__")
+BLOCK_RE = re.compile(r"\n\s*\n")
+NOT_PARAGRAPH = ("=", "*", "#", ":", ";", "|", "!", "{", "}", "----")
+TEMPLATE_TOKENS = re.compile(r"\{\{|\}\}")
+TABLE_TOKENS = re.compile(r"\{\||\|\}")
+BRACKET_TOKENS = re.compile(r"\[\[|\]\]")
+
+
+def _remove_balanced(text: str, tokens: re.Pattern, opener: str) -> str:
+    """Drop every balanced ``opener ... closer`` span, nested ones included."""
+    out = []
+    depth = pos = 0
+    for m in tokens.finditer(text):
+        if m.group() == opener:
+            if depth == 0:
+                out.append(text[pos:m.start()])
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                pos = m.end()
+    if depth == 0:
+        out.append(text[pos:])
+    return "".join(out)
+
+
+def _remove_media(text: str) -> str:
+    """Drop [[File:...]], [[Image:...]] and [[Category:...]], whose captions may hold links."""
+    out = []
+    pos = 0
+    for start in MEDIA_START_RE.finditer(text):
+        if start.start() < pos:
+            continue  # inside a caption already dropped
+        depth = 0
+        end = len(text)
+        for m in BRACKET_TOKENS.finditer(text, start.start()):
+            depth += 1 if m.group() == "[[" else -1
+            if depth == 0:
+                end = m.end()
+                break
+        out.append(text[pos:start.start()])
+        pos = end
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def _is_article_target(target: str) -> bool:
+    if not target or target.startswith(":"):
+        return False
+    if ":" in target:
+        prefix = target.split(":", 1)[0].strip()
+        # Namespaces, and interwiki/interlanguage prefixes such as de: or wikt:
+        if prefix.lower() in SKIP_NAMESPACES or (prefix.islower() and " " not in prefix):
+            return False
+    return True
+
+
+def title_href(target: str) -> str:
+    """``/wiki/`` href for a link target, percent-encoded the way MediaWiki renders it."""
+    target = target.split("#", 1)[0].strip().replace(" ", "_")
+    target = target[:1].upper() + target[1:]
+    return ARTICLE_PREFIX + quote(target, safe=";@$!*(),/~:'")
+
+
+def wikitext_links(text: str):
+    """Article hrefs in order of appearance, like the HTML extractors return them."""
+    links = []
+    for m in LINK_RE.finditer(text):
+        target = html.unescape(m.group(1)).strip()
+        if _is_article_target(target) and target.split("#", 1)[0].strip():
+            links.append(title_href(target))
+    return links
+
+
+def _link_text(m) -> str:
+    target = m.group(1).strip()
+    if ":" in target and not _is_article_target(target):
+        return ""
+    return m.group(2) if m.group(2) is not None else target.lstrip(":")
+
+
+def wikitext_paragraphs(text: str):
+    """Raw paragraph texts, ready for ``wiki_extract.clean_body``."""
+    text = COMMENT_RE.sub("", text)
+    text = REF_RE.sub("", text)
+    text = SKIP_TAG_RE.sub("", text)
+    text = _remove_balanced(text, TEMPLATE_TOKENS, "{{")
+    text = _remove_balanced(text, TABLE_TOKENS, "{|")
+    text = _remove_media(text)
+    text = LINK_RE.sub(_link_text, text)
+    text = EXTERNAL_RE.sub(r"\1", text)
+    text = QUOTES_RE.sub("", text)
+    text = MAGIC_RE.sub("", text)
+    text = TAG_RE.sub("", text)
+    text = html.unescape(text)
+
+    paragraphs = []
+    for block in BLOCK_RE.split(text):
+        lines = [ln for ln in block.split("\n") if ln.strip() and not ln.lstrip().startswith(NOT_PARAGRAPH)]
+        if lines:
+            paragraphs.append("\n".join(lines))
+    return paragraphs
+
+
+def parse_wikitext(text: str, title: str = ""):
+    """Same shape as the HTML parsers in wiki_extract: ``(paragraphs, links, title)``."""
+    return wikitext_paragraphs(text), wikitext_links(text), title
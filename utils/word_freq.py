@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word frequencies on disk, kept per document and mergeable.
+
+A SQLite file holds
+
+  - ``docs``:   one row per document with a hash of its text
+  - ``terms``:  ``(doc, word, count)``, the document's own counts
+  - ``totals``: ``(word, count)`` summed over all documents
+
+``add(doc, counts, digest)`` replaces a document's counts and adjusts the
+totals by the difference, so the store grows with each run instead of
+being rebuilt. ``unchanged(doc, digest)`` lets a rerun skip documents it
+already counted, so the work is proportional to the new or edited
+documents. Stores written by parallel workers are combined with
+``merge``. ``top(k)`` keeps a k-entry heap while scanning the totals
+rather than sorting the vocabulary:
+
+    store = WordFreqStore("word_frequency.sqlite")
+    if not store.unchanged(name, digest):
+        store.add(name, Counter(tokens), digest)
+    store.commit()
+    store.top(50)
+    python -m utils.word_freq word_frequency.sqlite --merge worker-*.sqlite --top 20
+"""
+
+import argparse
+import hashlib
+import heapq
+import os
+import sqlite3
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class WordFreqStore:
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS docs (doc TEXT PRIMARY KEY, digest TEXT)")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS terms (
+                    doc TEXT NOT NULL,
+                    word TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (doc, word)
+                ) WITHOUT ROWID""")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS totals (
+                    word TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL
+                ) WITHOUT ROWID""")
+
+    def unchanged(self, doc: str, digest: str) -> bool:
+        """Whether ``doc`` was already counted from text with this ``digest``."""
+        row = self.db.execute("SELECT digest FROM docs WHERE doc=?", (doc,)).fetchone()
+        return row is not None and digest is not None and row[0] == digest
+
+    def counts(self, doc: str) -> dict:
+        return dict(self.db.execute("SELECT word, count FROM terms WHERE doc=?", (doc,)))
+
+    def add(self, doc: str, counts, digest: str = None):
+        """Set ``doc``'s word counts (a mapping word -> count), replacing any it had."""
+        old = self.counts(doc)
+        delta = {word: -n for word, n in old.items()}
+        for word, n in counts.items():
+            delta[word] = delta.get(word, 0) + n
+        self.db.execute("DELETE FROM terms WHERE doc=?", (doc,))
+        self.db.executemany("INSERT INTO terms (doc, word, count) VALUES (?, ?, ?)",
+                            ((doc, word, n) for word, n in counts.items() if n > 0))
+        self._adjust(delta)
+        self.db.execute("INSERT INTO docs (doc, digest) VALUES (?, ?) "
+                        "ON CONFLICT(doc) DO UPDATE SET digest=excluded.digest", (doc, digest))
+
+    def remove(self, doc: str):
+        self._adjust({word: -n for word, n in self.counts(doc).items()})
+        self.db.execute("DELETE FROM terms WHERE doc=?", (doc,))
+        self.db.execute("DELETE FROM docs WHERE doc=?", (doc,))
+
+    def _adjust(self, delta):
+        self.db.executemany(
+            "INSERT INTO totals (word, count) VALUES (?, ?) "
+            "ON CONFLICT(word) DO UPDATE SET count=count + excluded.count",
+            ((word, n) for word, n in delta.items() if n))
+        if any(n < 0 for n in delta.values()):
+            self.db.execute("DELETE FROM totals WHERE count <= 0")
+
+    def merge(self, path: str) -> int:
+        """
+        Take over the documents of the store at ``path`` (e.g. a parallel
+        worker's) that are new here or were counted from different text.
+        Returns how many were taken.
+        """
+        other = WordFreqStore(path)
+        merged = 0
+        try:
+            for doc, digest in other.db.execute("SELECT doc, digest FROM docs"):
+                if not self.unchanged(doc, digest):
+                    self.add(doc, other.counts(doc), digest)
+                    merged += 1
+        finally:
+            other.close()
+        self.commit()
+        return merged
+
+    def top(self, k: int):
+        """The ``k`` most frequent ``(word, count)``, most frequent first."""
+        rows = self.db.execute("SELECT word, count FROM totals")
+        return heapq.nlargest(k, rows, key=lambda row: row[1])
+
+    def items(self):
+        """Every ``(word, count)``, most frequent first (sorted by SQLite, not in memory)."""
+        return self.db.execute("SELECT word, count FROM totals ORDER BY count DESC, word")
+
+    def documents(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM totals").fetchone()[0]
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge and query word-frequency stores.")
+    parser.add_argument("store", help="The store to query (and merge into)")
+    parser.add_argument("--merge", nargs="+", default=[], metavar="STORE", help="Stores to merge in first")
+    parser.add_argument("--top", type=int, default=20, help="How many words to list (default: 20)")
+    args = parser.parse_args()
+
+    store = WordFreqStore(args.store)
+    for path in args.merge:
+        print(f"{path}: {store.merge(path)} documents merged")
+    print(f"{store.documents()} documents, {len(store)} distinct words")
+    for word, count in store.top(args.top):
+        print(f"{count:>8}  {word}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,26 +2,43 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import asyncio
+import contextlib
 import csv
+import functools
+import hashlib
 import os
 import random
 import re
+import sqlite3
 import threading
 import time
-from collections import deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from urllib.parse import urljoin, urlparse, unquote
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, unquote, urlsplit
+from urllib.robotparser import RobotFileParser
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from utils.crawl_metrics import CrawlMetrics
+from utils.http_cache import CachedResponse, HttpCache, cached_get
+from utils.link_graph import LinkGraphWriter
+from utils.mediawiki_api import API_PATH, MAX_TITLES, fetch_batch
+from utils.near_dup import DuplicateIndex, from_signed, same_text, simhash, to_signed
+from utils.recrawl import DAY, plan
+from utils.segments import SegmentWriter
+from utils.shard_coordinator import ShardCoordinator, parse_shard
+from utils.url_store import HOST_SEP, HostFrontier, PackedFrontier, PriorityFrontier, make_seen
+from utils.wiki_dump import iter_dump_articles
+from utils.wikitext import parse_wikitext, title_href
+from utils.wiki_extract import (ARTICLE_PREFIX, BACKENDS, PARSERS, is_article_href, parse_bs4,
+                                resolve_backend, timed_extract)
 
 WIKI_BASE = "https://en.wikipedia.org"
-ARTICLE_PREFIX = "/wiki/"
-BAD_PREFIXES = (
-    "Category:", "File:", "Help:", "Portal:", "Special:", "Template:",
-    "Template_talk:", "Talk:", "Wikipedia:", "Module:", "Draft:",
-    "Book:", "TimedText:", "MediaWiki:", "Gadget:", "Gadget_definition:"
-)
+USER_AGENT = "RespectfulWikiScraper/1.0 (+non-malicious; for learning)"
+ROBOTS_AGENT = USER_AGENT.split("/", 1)[0]
 
 # -------- Utilities -------- #
 
@@ -31,95 +48,298 @@ def sanitize_filename(name: str) -> str:
     name = re.sub(r"[^\w\-\.]+", "_", name, flags=re.UNICODE)
     return name[:180]  # keep file names reasonable
 
-def clean_text(text: str) -> str:
-    # Remove bracketed citation numbers [1], [12], [a], [note 1]
-    text = re.sub(r"\[\s*([0-9]+|[a-zA-Z]+|note\s*\d+)\s*\]", "", text)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-def is_article_href(href: str) -> bool:
-    if not href or not href.startswith(ARTICLE_PREFIX):
-        return False
-    # filter out fragments and query
-    if "#" in href or "?" in href:
-        return False
-    topic = href.split(ARTICLE_PREFIX, 1)[-1]
-    # Skip non-article namespaces
-    for bad in BAD_PREFIXES:
-        if topic.startswith(bad):
-            return False
-    return True
+# -------- HTTP session with politeness -------- #
 
-def extract_title(soup: BeautifulSoup) -> str:
-    h1 = soup.find("h1", id="firstHeading")
-    return h1.get_text(strip=True) if h1 else ""
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
 
-# -------- HTTP session with politeness -------- #
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now if now is not None else time.time()
+    return max(0.0, when.timestamp() - now)
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every worker.
+
+    ``rate`` tokens are added per second up to ``burst``; each request takes
+    one. ``reserve()`` books a token and returns how long the caller must
+    wait for it, so threads and coroutines can both sleep on the result.
+    ``pause()`` holds back every request, e.g. for a Retry-After.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.stamp = time.monotonic()
+        self.not_before = 0.0
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.first = None
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, self.not_before - now, 0.0)
+            self.sent += 1
+            if self.first is None:
+                self.first = now + wait
+            return wait
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.not_before = max(self.not_before, time.monotonic() + seconds)
+
+    def measured_rps(self) -> float:
+        """Requests released per second since the first one."""
+        with self.lock:
+            if self.first is None or self.sent < 2:
+                return 0.0
+            elapsed = time.monotonic() - self.first
+            return (self.sent - 1) / elapsed if elapsed > 0 else 0.0
+
+class HostLimiters:
+    """
+    One RateLimiter per wiki host, so each host sees its own polite rate no
+    matter how many hosts are crawled. Hosts get ``rate`` and ``burst``
+    unless ``set`` gave them their own (from --host-rps or robots.txt).
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def set(self, netloc: str, rate: float, burst: int = None):
+        with self.lock:
+            self.limiters[netloc] = RateLimiter(rate=rate, burst=burst or self.burst)
+
+    def get(self, url: str) -> RateLimiter:
+        netloc = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(netloc)
+            if limiter is None:
+                limiter = self.limiters[netloc] = RateLimiter(rate=self.rate, burst=self.burst)
+            return limiter
+
+    def measured_rps(self) -> float:
+        """Requests released per second, summed over the hosts."""
+        with self.lock:
+            limiters = list(self.limiters.values())
+        return sum(limiter.measured_rps() for limiter in limiters)
+
+def load_robots(base: str, timeout: float):
+    """
+    The host's robots.txt as a RobotFileParser. Like ``RobotFileParser.read``,
+    401/403 forbid everything and other 4xx allow everything; an unreachable
+    host or a 5xx also allows everything, since the crawl's own retries and
+    rate limits still apply.
+    """
+    robots = RobotFileParser(base + "/robots.txt")
+    try:
+        resp = requests.get(robots.url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    except requests.RequestException:
+        robots.allow_all = True
+        return robots
+    if resp.status_code in (401, 403):
+        robots.disallow_all = True
+    elif resp.status_code >= 400:
+        robots.allow_all = True
+    else:
+        robots.parse(resp.text.splitlines())
+    return robots
+
+def robots_rps(robots: RobotFileParser):
+    """Requests per second allowed by Crawl-delay / Request-rate, or None if neither is set."""
+    rates = []
+    delay = robots.crawl_delay(ROBOTS_AGENT)
+    if delay:
+        rates.append(1.0 / float(delay))
+    rate = robots.request_rate(ROBOTS_AGENT)
+    if rate and rate.seconds:
+        rates.append(rate.requests / rate.seconds)
+    return min(rates) if rates else None
+
+def backoff_delay(attempt: int, delay: float, jitter: float, retry_after=None, cap: float = 60.0) -> float:
+    """Exponential backoff, or the server's Retry-After when it sent one."""
+    if retry_after is not None:
+        return min(retry_after, cap * 5)
+    return min(cap, delay * 2 ** (attempt - 1)) + random.random() * jitter
 
 class PoliteSession:
     """
     A polite HTTP session with:
       - custom UA
-      - max retries (simple)
-      - global rate limit (semaphore + sleep)
+      - max retries with exponential backoff, honouring Retry-After
+      - a token-bucket rate limit per host (HostLimiters)
+      - optional on-disk cache with conditional GET (HttpCache)
+      - a keep-alive connection pool of ``pool_size`` connections per host,
+        so every worker keeps its connection (and TLS session) between requests
+      - gzip (and brotli, when installed) transfer encoding
+      - fetch latency, bytes, retries and connection reuse recorded in CrawlMetrics
     """
-    def __init__(self, delay: float, jitter: float, max_retries: int, timeout: float, max_parallel: int):
+    def __init__(self, delay: float, jitter: float, max_retries: int, timeout: float,
+                 limiter: HostLimiters, cache: HttpCache = None, metrics: CrawlMetrics = None,
+                 pool_size: int = 10):
         self.sess = requests.Session()
         self.sess.headers.update({
-            "User-Agent": "RespectfulWikiScraper/1.0 (+non-malicious; for learning) "
-                          "Python-requests"
+            "User-Agent": f"{USER_AGENT} Python-requests",
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive",
         })
+        # pool_block: a worker waits for a free connection instead of opening a throwaway one
+        self.adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+        self.sess.mount("https://", self.adapter)
+        self.sess.mount("http://", self.adapter)
         self.delay = delay
         self.jitter = jitter
         self.max_retries = max_retries
         self.timeout = timeout
-        self.lock = threading.Lock()
-        self.sema = threading.Semaphore(max_parallel)
+        self.limiter = limiter
+        self.cache = cache
+        self.metrics = metrics or CrawlMetrics()
 
     def get(self, url: str):
-        # Rate limit: one token per request, sleep after release to spread load
+        limiter = self.limiter.get(url)
         for attempt in range(1, self.max_retries + 1):
-            self.sema.acquire()
+            limiter.acquire()
+            retry_after = status = None
+            self.metrics.request_started()
+            t0, nbytes, wire = time.perf_counter(), 0, 0
             try:
-                resp = self.sess.get(url, timeout=self.timeout)
-                if resp.status_code in (429, 500, 502, 503, 504):
-                    # Backoff on transient errors
-                    back = self.delay * attempt + random.random() * self.jitter
-                    time.sleep(back)
-                else:
+                resp = cached_get(self.sess, url, self.cache, timeout=self.timeout)
+                nbytes, wire, status = resp.nbytes, resp.wire_bytes, resp.status_code
+                if resp.status_code not in TRANSIENT_STATUS:
                     return resp
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
             except requests.RequestException:
-                back = self.delay * attempt + random.random() * self.jitter
-                time.sleep(back)
+                pass
             finally:
-                self.sema.release()
-            # small spacing even after release to keep average RPS lower
-            time.sleep(self.delay + random.random() * self.jitter)
+                self.metrics.request_finished(time.perf_counter() - t0, nbytes, wire)
+                self.metrics.connections(*self.connection_stats())
+            if attempt == self.max_retries:
+                self.metrics.gave_up()
+                break
+            self.metrics.retry(status)
+            back = backoff_delay(attempt, self.delay, self.jitter, retry_after)
+            if retry_after is not None:
+                # The server asked everyone to slow down, not just this worker
+                limiter.pause(back)
+            time.sleep(back)
         return None
 
-# -------- Scrape logic -------- #
+    def connection_stats(self):
+        """``(requests, connections opened)`` summed over the adapter's per-host pools."""
+        pools = self.adapter.poolmanager.pools
+        sent = opened = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                sent += pool.num_requests
+                opened += pool.num_connections
+        return sent, opened
+
+class AsyncPoliteSession:
+    """
+    asyncio counterpart of PoliteSession (needs aiohttp).
+
+    Shares the HostLimiters logic; waiting happens on the event loop.
+    Must be created inside a running event loop.
+    """
+    def __init__(self, delay: float, jitter: float, max_retries: int, timeout: float,
+                 limiter: HostLimiters, max_parallel: int, cache: HttpCache = None,
+                 metrics: CrawlMetrics = None):
+        import aiohttp  # optional dependency, only needed for --engine async
+
+        self.metrics = metrics or CrawlMetrics()
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection(reused=False))
+        trace.on_connection_reuseconn.append(self._on_connection(reused=True))
+        self.sess = aiohttp.ClientSession(
+            headers={"User-Agent": f"{USER_AGENT} Python-aiohttp",
+                     "Accept-Encoding": ACCEPT_ENCODING},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=aiohttp.TCPConnector(limit=max_parallel, limit_per_host=max_parallel,
+                                           keepalive_timeout=30),
+            trace_configs=[trace],
+        )
+        self.errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        self.delay = delay
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.limiter = limiter
+        self.cache = cache
+
+    def _on_connection(self, reused: bool):
+        async def record(_session, _ctx, _params):
+            self.metrics.connection_opened(reused)
+        return record
+
+    async def _fetch(self, url: str, conditional: bool):
+        headers = self.cache.conditional_headers(url) if self.cache and conditional else None
+        self.metrics.request_started()
+        t0, nbytes, wire = time.perf_counter(), 0, 0
+        try:
+            async with self.sess.get(url, headers=headers) as resp:
+                raw = await resp.read()
+                nbytes = len(raw)
+                # aiohttp only hands out the decoded body; an encoded one's size is in Content-Length
+                length = resp.headers.get("Content-Length")
+                wire = int(length) if length and resp.headers.get("Content-Encoding") else nbytes
+                text = await resp.text() if resp.status != 304 else ""
+                return CachedResponse(resp.status, text, resp.headers, False, nbytes, wire)
+        finally:
+            self.metrics.request_finished(time.perf_counter() - t0, nbytes, wire)
+
+    async def get(self, url: str):
+        """Same contract as PoliteSession.get: a response-like object or None."""
+        limiter = self.limiter.get(url)
+        for attempt in range(1, self.max_retries + 1):
+            await asyncio.sleep(limiter.reserve())
+            retry_after = status = None
+            try:
+                resp = await self._fetch(url, conditional=True)
+                if resp.status_code == 304:
+                    text = self.cache.not_modified(url)
+                    if text is not None:
+                        return CachedResponse(200, text, resp.headers, True, resp.nbytes, resp.wire_bytes)
+                    resp = await self._fetch(url, conditional=False)
+                status = resp.status_code
+                if resp.status_code not in TRANSIENT_STATUS:
+                    if self.cache and resp.status_code == 200:
+                        self.cache.store(url, resp.headers, resp.text)
+                    return resp
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            except self.errors:
+                pass
+            if attempt == self.max_retries:
+                self.metrics.gave_up()
+                break
+            self.metrics.retry(status)
+            back = backoff_delay(attempt, self.delay, self.jitter, retry_after)
+            if retry_after is not None:
+                limiter.pause(back)
+            await asyncio.sleep(back)
+        return None
 
-def parse_article_html(html: str):
-    soup = BeautifulSoup(html, "html.parser")
-    content = soup.find("div", class_="mw-parser-output")
-    if not content:
-        return "", [], soup
-    # Collect paragraphs (skip empty)
-    paragraphs = []
-    for p in content.find_all("p"):
-        txt = clean_text(p.get_text())
-        if txt:
-            paragraphs.append(txt)
-    body = "\n\n".join(paragraphs)
-
-    # Collect outgoing article links
-    links = []
-    for a in content.select("a[href]"):
-        href = a.get("href")
-        if is_article_href(href):
-            links.append(href)
-    return body, links, soup
+    async def close(self):
+        await self.sess.close()
+
+# -------- Scrape logic -------- #
 
 def save_article(out_dir: str, title: str, url: str, body: str) -> str:
     if not title:
@@ -131,88 +351,960 @@ def save_article(out_dir: str, title: str, url: str, body: str) -> str:
         f.write(body)
     return fpath
 
-def scrape_single(session: PoliteSession, url: str):
-    resp = session.get(url)
+FAILED = (None, None, None, None)  # body, links, title, status
+
+def fetched_html(cache: HttpCache, url: str, resp):
+    """
+    Network half of a scrape: ``(html, None)`` when the page still has to be
+    parsed, or ``(None, result)`` when it failed or its extraction is cached.
+    """
     if not resp or resp.status_code != 200 or not resp.text:
-        return None, None, None, None  # body, links, title, status
-    body, links, soup = parse_article_html(resp.text)
-    title = extract_title(soup)
-    return body, links, title, resp.status_code
+        return None, FAILED
+    # An unchanged page whose extraction is already on disk skips the parse
+    if cache is not None and getattr(resp, "from_cache", False):
+        hit = cache.extracted(url)
+        if hit is not None:
+            body, links, title = hit
+            return None, (body, links, title, 200)
+    return resp.text, None
+
+# ``extract(html)`` returns ``((body, links, title), parse_seconds, clean_seconds)``;
+# a partial of module-level functions, so it can be shipped to a process pool.
+DEFAULT_EXTRACT = functools.partial(timed_extract, parse_bs4)
+
+def make_extract(parser: str = "auto"):
+    return functools.partial(timed_extract, PARSERS[resolve_backend(parser)])
+
+def parsed_result(session, url: str, timed):
+    (body, links, title), parse_s, clean_s = timed
+    session.metrics.observe("parse", parse_s)
+    session.metrics.observe("clean", clean_s)
+    if session.cache is not None:
+        session.cache.put_extracted(url, [body, links, title])
+    return body, links, title, 200
+
+def fetch_page(session: PoliteSession, url: str):
+    return fetched_html(session.cache, url, session.get(url))
+
+def scrape_single(session: PoliteSession, url: str, extract=DEFAULT_EXTRACT):
+    html, result = fetch_page(session, url)
+    if html is None:
+        return result
+    return parsed_result(session, url, extract(html))
+
+async def scrape_single_async(session: AsyncPoliteSession, url: str, extract=DEFAULT_EXTRACT,
+                              parse_pool: ProcessPoolExecutor = None):
+    html, result = fetched_html(session.cache, url, await session.get(url))
+    if html is None:
+        return result
+    if parse_pool is not None:
+        timed = await asyncio.get_running_loop().run_in_executor(parse_pool, extract, html)
+    else:
+        timed = extract(html)
+    return parsed_result(session, url, timed)
+
+def scrape_batch(session: PoliteSession, api_url: str, urls):
+    """``{url: result}`` for a batch of article URLs, fetched with batched API queries."""
+    titles = {unquote(url.split(ARTICLE_PREFIX, 1)[-1]).replace("_", " "): url for url in urls}
+    pages = fetch_batch(session.get, api_url, titles)
+    if pages is None:
+        return {url: FAILED for url in urls}
+    results = {}
+    for title, url in titles.items():
+        page = pages.get(title)
+        if page is None:
+            results[url] = (None, None, None, 404)
+            continue
+        page_title, text = page
+        parse = functools.partial(parse_wikitext, title=page_title)
+        results[url] = parsed_result(session, url, timed_extract(parse, text))
+    return results
 
 # -------- Crawler -------- #
 
-def crawl(start_topic: str, out_dir: str, limit: int, max_depth: int, workers: int,
-          delay: float, jitter: float, timeout: float, retries: int):
-    os.makedirs(out_dir, exist_ok=True)
+INDEX_HEADER = ["title", "url", "file", "bytes", "status", "depth", "out_links", "canonical_url"]
+
+class CrawlState:
+    """
+    SQLite checkpoint of a crawl, kept next to index.csv.
 
-    index_path = os.path.join(out_dir, "index.csv")
-    index_fp = open(index_path, "w", encoding="utf-8", newline="")
-    index = csv.writer(index_fp)
-    index.writerow(["title", "url", "file", "bytes", "status", "depth", "out_links"])
+    Every discovered URL is a row; ``done`` stays NULL while it is queued and
+    becomes a completion sequence number once its index row is known. Each
+    page is committed together with the children it enqueued, so after a
+    crash the frontier, the seen set and the index can all be rebuilt.
+    Saved pages keep their SimHash so the duplicate index can be rebuilt too,
+    and a fetch history for recrawl scheduling (utils/recrawl.py): body hash,
+    last fetch time, number of fetches, changes seen and time between fetches.
+    """
+    def __init__(self, path: str, resume: bool):
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                depth INTEGER NOT NULL,
+                done INTEGER,
+                title TEXT, file TEXT, bytes INTEGER, status TEXT, out_links INTEGER,
+                canonical TEXT, simhash INTEGER,
+                content_hash TEXT, fetched REAL, fetches INTEGER, changes INTEGER, interval_sum REAL
+            )""")
+        # Links owned by other shards, forwarded to the coordinator after the page commits
+        self.db.execute("CREATE TABLE IF NOT EXISTS outbox (url TEXT PRIMARY KEY, depth INTEGER NOT NULL)")
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(pages)")}
+        for column, kind in (("canonical", "TEXT"), ("simhash", "INTEGER"), ("content_hash", "TEXT"),
+                             ("fetched", "REAL"), ("fetches", "INTEGER"), ("changes", "INTEGER"),
+                             ("interval_sum", "REAL")):
+            if column not in columns:  # checkpoint from an older version
+                self.db.execute(f"ALTER TABLE pages ADD COLUMN {column} {kind}")
+        self.db.commit()
+        self.seq = self.db.execute("SELECT COALESCE(MAX(done), 0) FROM pages").fetchone()[0]
 
-    start_url = f"{WIKI_BASE}{ARTICLE_PREFIX}{start_topic.replace(' ', '_')}"
-    seen = set()
-    q = deque([(start_url, 0)])
-    seen.add(start_url)
+    def add(self, url: str, depth: int):
+        self.db.execute("INSERT OR IGNORE INTO pages (url, depth) VALUES (?, ?)", (url, depth))
 
-    session = PoliteSession(delay=delay, jitter=jitter, max_retries=retries, timeout=timeout,
-                            max_parallel=workers)
+    def complete(self, row, commit: bool = True, fingerprint: int = None, content_hash: str = None) -> bool:
+        """Store the page's index row; with ``content_hash``, also its fetch history. True if the body changed."""
+        title, url, fname, nbytes, status, _depth, out_links, canonical = row
+        self.seq += 1
+        self.db.execute(
+            "UPDATE pages SET done=?, title=?, file=?, bytes=?, status=?, out_links=?, canonical=?, "
+            "simhash=? WHERE url=?",
+            (self.seq, title, fname, nbytes, str(status), out_links, canonical,
+             to_signed(fingerprint) if fingerprint is not None else None, url))
+        changed = False
+        if content_hash is not None:
+            now = time.time()
+            old_hash, fetched, fetches, changes, interval_sum = self.db.execute(
+                "SELECT content_hash, fetched, fetches, changes, interval_sum FROM pages WHERE url=?",
+                (url,)).fetchone()
+            changed = old_hash is not None and old_hash != content_hash
+            self.db.execute(
+                "UPDATE pages SET content_hash=?, fetched=?, fetches=?, changes=?, interval_sum=? WHERE url=?",
+                (content_hash, now, (fetches or 0) + 1, (changes or 0) + changed,
+                 (interval_sum or 0.0) + (now - fetched if fetched is not None else 0.0), url))
+        if commit:
+            self.db.commit()
+        return changed
 
-    saved = 0
-    futures_map = {}
-    page_depth = {}
+    def history(self):
+        """``(url, depth, fetched, fetches, changes, interval_sum)`` of every saved page not queued."""
+        return self.db.execute(
+            "SELECT url, depth, fetched, fetches, changes, interval_sum FROM pages "
+            "WHERE status='200' AND done IS NOT NULL")
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        while q and saved < limit:
-            # Schedule up to remaining slots
-            while q and len(futures_map) < workers and saved + len(futures_map) < limit:
-                url, depth = q.popleft()
-                page_depth[url] = depth
-                futures_map[executor.submit(scrape_single, session, url)] = url
+    def revisits_since(self, t: float) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM pages WHERE fetched >= ? AND fetches > 1", (t,)).fetchone()[0]
+
+    def forget(self, urls):
+        """Queue completed pages again as if they had never been fetched."""
+        self.db.executemany(
+            "UPDATE pages SET done=NULL, title=NULL, file=NULL, bytes=NULL, status=NULL, out_links=NULL, "
+            "canonical=NULL, simhash=NULL WHERE url=?", ((url,) for url in urls))
+        self.db.commit()
+
+    def reopen(self, url: str):
+        """Queue a completed page again; its index row is kept until the revisit completes."""
+        self.db.execute("UPDATE pages SET done=NULL WHERE url=?", (url,))
+
+    def reopened(self):
+        """``(url, depth)`` of the pages queued again by ``reopen``."""
+        return self.db.execute("SELECT url, depth FROM pages WHERE done IS NULL AND status IS NOT NULL ORDER BY id")
+
+    def restore(self, url: str, commit: bool = True):
+        """Give a page whose revisit failed its old index row back."""
+        self.seq += 1
+        self.db.execute("UPDATE pages SET done=? WHERE url=?", (self.seq, url))
+        if commit:
+            self.db.commit()
+
+    def forward(self, url: str, depth: int):
+        self.db.execute("INSERT OR IGNORE INTO outbox (url, depth) VALUES (?, ?)", (url, depth))
+
+    def outbox(self):
+        return self.db.execute("SELECT url, depth FROM outbox").fetchall()
+
+    def forwarded(self, urls):
+        self.db.executemany("DELETE FROM outbox WHERE url=?", ((u,) for u in urls))
+        self.db.commit()
+
+    def commit(self):
+        self.db.commit()
+
+    def urls(self):
+        return (url for (url,) in self.db.execute("SELECT url FROM pages"))
+
+    def pending(self):
+        return self.db.execute("SELECT url, depth FROM pages WHERE done IS NULL ORDER BY id")
+
+    def index_rows(self):
+        return self.db.execute(
+            "SELECT title, url, file, bytes, status, depth, out_links, COALESCE(canonical, '') FROM pages "
+            "WHERE done IS NOT NULL OR status IS NOT NULL ORDER BY done IS NULL, done").fetchall()
+
+    def originals(self):
+        """``(url, title, fingerprint, bytes)`` of every saved page."""
+        for url, title, fp, nbytes in self.db.execute(
+                "SELECT url, title, simhash, bytes FROM pages WHERE status='200'"):
+            yield url, title, from_signed(fp) if fp is not None else None, nbytes
+
+    def saved_file(self, url: str):
+        row = self.db.execute("SELECT file FROM pages WHERE url=? AND status='200'", (url,)).fetchone()
+        return row[0] if row else None
+
+    def saved(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM pages WHERE status='200'").fetchone()[0]
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+class CrawlFrontier:
+    """
+    Queue, seen set, index writer and checkpoint shared by both crawl engines.
 
+    The queue and the seen set hold title keys (the UTF-8 path after
+    ``/wiki/``) rather than full URLs; see utils/url_store.py for the
+    ``dedup`` modes and disk spilling of the queue. ``frontier="best"``
+    replaces the BFS queue with a PriorityFrontier: articles linked from
+    more crawled pages, and sharing more words with the start topic, are
+    fetched first.
+
+    ``hosts`` are further wikis crawled alongside ``base``, seeded with
+    ``seeds``; links between any of them are followed. Their keys carry the
+    host (``b"de.wikipedia.org|Title"``), each host has its own queue
+    (HostFrontier) and its pages are saved under <out>/<host>/. With
+    ``robots`` (netloc -> RobotFileParser) disallowed pages are never queued.
+    Absolute links to wikis that are not crawled are dropped and not counted
+    in out_links; without ``hosts`` that means every absolute link.
+
+    Unless ``near_dup_bits`` is None, a page whose title was already saved
+    (a redirect), or whose SimHash is within that many bits of a saved one
+    and whose body is near-identical to it (utils/near_dup.py), is recorded
+    as ``DUP`` with the original's URL as its canonical_url; it is neither
+    saved nor expanded.
+
+    With ``graph`` every saved page's links, also those beyond the depth or
+    page limit, are written to <out>/graph as a CSR link graph
+    (utils/link_graph.py).
+
+    With a ``coordinator`` this is one shard of a sharded crawl: links to
+    articles owned by other shards go into the checkpoint's outbox and on
+    to the coordinator, and links forwarded to this shard are pulled from it
+    every ``SYNC_INTERVAL`` seconds (utils/shard_coordinator.py).
+
+    ``revisit()`` turns it into an incremental recrawl of the saved pages
+    most likely to have changed (utils/recrawl.py). A revisit that fails
+    keeps the page's previous row.
+
+    With ``output="segments"`` articles go to packed segment files
+    (utils/segments.py) instead of one .txt each. The checkpoint is then
+    committed on every segment flush, so both always agree after a crash.
+    """
+    def __init__(self, start_url: str, base: str, out_dir: str, limit: int, max_depth: int,
+                 resume: bool = False, dedup: str = "exact", bloom_capacity: int = 10_000_000,
+                 spill: bool = False, output: str = "files", metrics: CrawlMetrics = None,
+                 frontier: str = "bfs", topic_weight: float = 5.0, near_dup_bits: int = 3,
+                 graph: bool = False, coordinator: ShardCoordinator = None, hosts=(), seeds=(),
+                 robots: dict = None, workers: int = 1):
+        self.base = base
+        self.primary = urlsplit(base).netloc
+        self.hosts = {urlsplit(h).netloc: h for h in hosts}
+        self.prefixes = {netloc: h + ARTICLE_PREFIX for netloc, h in self.hosts.items()}
+        self.prefixes[self.primary] = base + ARTICLE_PREFIX
+        # Absolute links are only followed (and counted) between the crawled wikis;
+        # a single-wiki crawl keeps the relative ones, as it always has
+        self.link_hosts = frozenset(self.prefixes) if self.hosts else frozenset()
+        self.robots = robots or {}
+        self.host_pages = {}
+        self.coordinator = coordinator
+        self.last_sync = 0.0
+        self.metrics = metrics or CrawlMetrics()
+        self.prefix = base + ARTICLE_PREFIX
+        self.out_dir = out_dir
+        self.limit = limit
+        self.max_depth = max_depth
+        self.state = CrawlState(os.path.join(out_dir, "crawl_state.sqlite"), resume)
+
+        # index.csv is rewritten from the checkpoint, so rows written after the
+        # last commit of a crashed run cannot show up twice.
+        self.index_path = os.path.join(out_dir, "index.csv")
+        self.index_fp = open(self.index_path, "w", encoding="utf-8", newline="")
+        self.index = csv.writer(self.index_fp)
+        self.index.writerow(INDEX_HEADER)
+        rows = self.state.index_rows()
+        self.segments = None
+        if output == "segments":
+            self.segments = SegmentWriter(os.path.join(out_dir, "segments"),
+                                          committed_refs=(r[2] for r in rows if r[2]), resume=resume)
+            if self.segments.lost:
+                # Pages whose saved record never reached the disk are fetched again
+                lost = set(self.segments.lost)
+                self.state.forget([r[1] for r in rows if r[2] in lost])
+                rows = self.state.index_rows()
+        self.index.writerows(rows)
+
+        self.seen = make_seen(dedup, capacity=bloom_capacity)
+        self.best_first = frontier == "best"
+        topic = self.key(start_url)
+        spill_dir = os.path.join(out_dir, ".frontier") if spill else None
+
+        def make_queue(host: str):
+            if self.best_first:
+                return PriorityFrontier(topic, topic_weight)
+            host_spill = os.path.join(spill_dir, sanitize_filename(host)) if spill_dir and host else spill_dir
+            return PackedFrontier(spill_dir=host_spill)
+
+        self.make_queue = make_queue
+        self.workers = workers
+        self.q = HostFrontier(make_queue, workers)
+        for url in self.state.urls():
+            self.seen.add(self.key(url))
+        for url, depth in self.state.pending():
+            self.q.append(self.key(url), depth)
+        self.saved = self.state.saved()
+        self.revisits = {url for url, _ in self.state.reopened()}  # left queued by an interrupted recrawl
+        self.changed = self.revisit_failures = 0
+        self.graph = LinkGraphWriter(os.path.join(out_dir, "graph"), resume) if graph else None
+        self.duplicates = None
+        if near_dup_bits is not None:
+            self.duplicates = DuplicateIndex(near_dup_bits)
+            for url, title, fp, nbytes in self.state.originals():
+                self.duplicates.add(url, self.dup_title(url, title), fp, nbytes)
+        for seed in (start_url, *seeds):
+            seed_key = self.key(seed)
+            if seed_key in self.seen or not self.crawlable(seed):
+                continue
+            self.seen.add(seed_key)
+            if self.remote(seed_key):
+                self.state.forward(seed, 0)
+            else:
+                self.q.append(seed_key, 0)
+                self.state.add(seed, 0)
+        self.state.commit()
+
+    def key(self, url: str) -> bytes:
+        if url.startswith(self.prefix):
+            return url[len(self.prefix):].encode("utf-8")
+        parts = urlsplit(url)
+        return parts.netloc.encode("utf-8") + HOST_SEP + parts.path[len(ARTICLE_PREFIX):].encode("utf-8")
+
+    def url(self, key: bytes) -> str:
+        host, sep, title = key.partition(HOST_SEP)
+        if not sep:
+            return self.prefix + key.decode("utf-8")
+        host = host.decode("utf-8")
+        prefix = self.prefixes.get(host) or f"{urlsplit(self.base).scheme}://{host}{ARTICLE_PREFIX}"
+        return prefix + title.decode("utf-8")
+
+    def crawlable(self, url: str) -> bool:
+        """An article on one of the crawled wikis that its robots.txt lets us fetch."""
+        netloc = urlsplit(url).netloc
+        prefix = self.prefixes.get(netloc)
+        if prefix is None or not url.startswith(prefix):
+            return False
+        robots = self.robots.get(netloc)
+        return robots is None or robots.can_fetch(ROBOTS_AGENT, url)
+
+    def dup_title(self, url: str, title: str) -> str:
+        """Title for redirect detection; the same title on another wiki is another article."""
+        netloc = urlsplit(url).netloc
+        return title if not title or netloc == self.primary else f"{netloc}|{title}"
+
+    def done(self) -> bool:
+        return self.saved >= self.limit
+
+    def revisit(self, budget: int, now: float):
+        """
+        Queue the saved pages most likely to have changed, without following
+        their links, so that no more than ``budget`` revisits happen per day.
+        Returns the plan, ``[(urgency, probability changed, url, depth)]``.
+        """
+        # Only revisits are queued: links left pending by the last crawl wait for the next one
+        self.q = HostFrontier(self.make_queue, self.workers)
+        for url, depth in self.state.reopened():
+            self.q.append(self.key(url), depth)
+        budget -= self.state.revisits_since(now - DAY) + len(self.q)
+        schedule = plan(self.state.history(), budget, now)
+        for _urgency, _p_changed, url, depth in schedule:
+            self.state.reopen(url)
+            self.q.append(self.key(url), depth)
+            self.revisits.add(url)
+        self.state.commit()
+        self.max_depth = -1
+        self.limit = self.saved + len(self.q)
+        return schedule
+
+    def flush_output(self):
+        """Write out buffered segment records and graph edges ahead of a checkpoint commit."""
+        if self.segments is not None:
+            self.segments.flush()
+        if self.graph is not None:
+            self.graph.flush()
+
+    def remote(self, key: bytes) -> bool:
+        """True if another shard owns this article."""
+        return self.coordinator is not None and self.coordinator.owner(key) != self.coordinator.shard
+
+    def sync(self):
+        """Push this shard's outbox to the coordinator and pull the links forwarded to it."""
+        self.last_sync = time.monotonic()
+        self.flush_output()  # both steps commit the checkpoint
+        outbox = self.state.outbox()
+        if outbox:
+            self.coordinator.forward((url, self.key(url), depth) for url, depth in outbox)
+            self.state.forwarded([url for url, _ in outbox])
+        inbox = self.coordinator.unclaimed()
+        for url, depth in inbox:
+            key = self.key(url)
+            if key not in self.seen:
+                self.seen.add(key)
+                self.q.append(key, depth)
+                self.state.add(url, depth)
+        if inbox:
+            self.state.commit()
+            self.coordinator.claimed([url for url, _ in inbox])
+        return len(inbox)
+
+    def wait_for_work(self, poll: float = 1.0) -> bool:
+        """
+        Called once this shard has nothing queued or in flight: go idle until
+        links arrive (True), or every shard is finished (False).
+        """
+        if self.done():
+            self.sync()
+            self.coordinator.set_state("done", self.saved)
+            return False
+        self.sync()
+        if self.q:
+            return True
+        self.coordinator.set_state("idle", self.saved)
+        while True:
+            if self.coordinator.unclaimed(1):
+                self.coordinator.set_state("busy", self.saved)
+                self.sync()
+                if self.q:
+                    return True
+                self.coordinator.set_state("idle", self.saved)
+            if self.coordinator.finished():
+                return False
+            time.sleep(poll)
+
+    def next_batch(self, in_flight: int, slots: int):
+        """Pop up to ``slots`` (url, depth) pairs without overshooting the limit."""
+        if self.coordinator is not None and time.monotonic() - self.last_sync >= SYNC_INTERVAL:
+            self.sync()
+        while self.q and slots > 0 and self.saved + in_flight < self.limit:
+            item = self.q.popleft()
+            if item is None:  # every host with queued pages already has its share of the workers
+                break
+            in_flight += 1
+            slots -= 1
+            key, depth = item
+            yield self.url(key), depth
+
+    def same_as_saved(self, url: str, body: str) -> bool:
+        """Whether ``body`` is near-identical to the saved copy of ``url`` (False if it cannot be read)."""
+        fname = self.state.saved_file(url)
+        if not fname:
+            return False
+        try:
+            if self.segments is not None:
+                record = self.segments.read(fname)
+                saved = record["body"] if record else None
+            else:
+                with open(os.path.join(self.out_dir, fname), encoding="utf-8") as f:
+                    saved = f.read()
+        except OSError:
+            return False
+        return saved is not None and same_text(body, saved)
+
+    def record(self, url: str, depth: int, result, in_flight: int):
+        body, links, title, status = result
+        links = [href for href in links or [] if is_article_href(href, self.link_hosts)]
+        # With segments the checkpoint only commits once the records it refers to are flushed
+        commit = self.segments is None
+        t0 = time.perf_counter()
+        self.q.release(self.key(url))
+        fp = original = content_hash = None
+        if body and status == 200 and self.duplicates is not None:
+            fp = simhash(body)
+            original = self.duplicates.find(self.dup_title(url, title), fp, len(body.encode("utf-8")),
+                                            confirm=lambda other: self.same_as_saved(other, body))
+            if original == url:  # a revisit finding its own earlier copy
+                original = None
+        if url in self.revisits and not (body and status == 200):
+            self.revisits.discard(url)
+            self.revisit_failures += 1
+            self.state.restore(url, commit=self.segments is None)
+            self.metrics.page_done(False, len(self.q))
+            return
+        if original is not None:
+            row = [title or "", url, "", 0, "DUP", depth, len(links), original]
+        elif body and status == 200:
+            content_hash = hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+            netloc = urlsplit(url).netloc
+            if self.segments is not None:
+                fname, commit = self.segments.append({"title": title or "", "url": url, "body": body})
+                nbytes = len(body.encode("utf-8"))
+            else:
+                host_dir = self.out_dir
+                if netloc != self.primary:
+                    host_dir = os.path.join(self.out_dir, sanitize_filename(netloc))
+                    os.makedirs(host_dir, exist_ok=True)
+                fpath = save_article(host_dir, title, url, body)
+                fname, nbytes = os.path.relpath(fpath, self.out_dir), os.path.getsize(fpath)
+            if url not in self.revisits:
+                self.saved += 1
+            self.host_pages[netloc] = self.host_pages.get(netloc, 0) + 1
+            row = [
+                title or "",
+                url,
+                fname,
+                nbytes,
+                status,
+                depth,
+                len(links),
+                url
+            ]
+            if self.duplicates is not None:
+                self.duplicates.add(url, self.dup_title(url, title), fp, len(body.encode("utf-8")))
+
+            # A page linking to an article twice still counts as one in-link
+            children = []
+            for href in dict.fromkeys(links):
+                full = urljoin(url, href)
+                # Keep within the crawled wikis
+                if self.crawlable(full):
+                    children.append((self.key(full), full))
+            if self.graph is not None:
+                self.graph.add_page(self.key(url).decode("utf-8"), [k.decode("utf-8") for k, _ in children])
+
+            # Enqueue children if within depth and limit
+            if depth < self.max_depth:
+                for key, full in children:
+                    if self.remote(key):
+                        if key not in self.seen:
+                            self.seen.add(key)
+                            self.state.forward(full, depth + 1)
+                        continue
+                    if key in self.seen:
+                        if self.best_first:
+                            self.q.add_link(key, depth + 1)
+                    elif self.saved + in_flight < self.limit:
+                        self.seen.add(key)
+                        self.q.append(key, depth + 1)
+                        self.state.add(full, depth + 1)
+        else:
+            row = ["", url, "", 0, status or "ERR", depth, 0, ""]
+        if commit and self.graph is not None:
+            self.graph.flush()
+        self.changed += self.state.complete(row, commit=commit, fingerprint=fp if original is None else None,
+                                            content_hash=content_hash)
+        self.revisits.discard(url)
+        self.index.writerow(row)
+        self.metrics.observe("save", time.perf_counter() - t0)
+        self.metrics.page_done(row[4] == 200, len(self.q), duplicate=original is not None)
+
+    def close(self):
+        if self.segments is not None:
+            self.segments.close()
+        if self.graph is not None:
+            self.graph.close()
+        if self.max_depth < 0:
+            # Revisited pages were appended again; rewrite the index with one row each
+            self.state.commit()
+            self.index_fp.seek(0)
+            self.index_fp.truncate()
+            self.index.writerow(INDEX_HEADER)
+            self.index.writerows(self.state.index_rows())
+        self.state.close()
+        self.index_fp.close()
+
+SYNC_INTERVAL = 1.0  # seconds between coordinator syncs while a shard is busy
+
+def merge_shard_indexes(out_dir: str, shards: int) -> str:
+    """Concatenate every shard's index.csv into <out>/index.csv, with file paths relative to <out>."""
+    path = os.path.join(out_dir, "index.csv")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        index = csv.writer(f)
+        index.writerow(INDEX_HEADER)
+        for i in range(shards):
+            shard_dir = shard_dir_name(i, shards)
+            shard_index = os.path.join(out_dir, shard_dir, "index.csv")
+            if not os.path.exists(shard_index):
+                continue
+            segments = os.path.isdir(os.path.join(out_dir, shard_dir, "segments"))
+            prefix = f"{shard_dir}/segments/" if segments else f"{shard_dir}/"
+            with open(shard_index, encoding="utf-8", newline="") as src:
+                rows = csv.reader(src)
+                next(rows, None)
+                for row in rows:
+                    if row[2]:
+                        row[2] = prefix + row[2]
+                    index.writerow(row)
+    os.replace(tmp, path)
+    return path
+
+def shard_dir_name(i: int, shards: int) -> str:
+    return os.path.join("shards", f"{i:03d}-of-{shards:03d}")
+
+def crawl_threads(frontier: CrawlFrontier, session: PoliteSession, workers: int, extract=DEFAULT_EXTRACT):
+    futures_map = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while not frontier.done():
+            # Refill every free slot, then wait for the first page to land
+            for url, depth in frontier.next_batch(len(futures_map), workers - len(futures_map)):
+                futures_map[executor.submit(scrape_single, session, url, extract)] = (url, depth)
             if not futures_map:
                 break
 
-            done, _pending = as_completed(list(futures_map.keys()), timeout=None), None
+            done, _pending = wait(list(futures_map), return_when=FIRST_COMPLETED)
             for fut in done:
-                url = futures_map.pop(fut)
-                depth = page_depth.get(url, 0)
+                url, depth = futures_map.pop(fut)
                 try:
-                    body, links, title, status = fut.result()
+                    result = fut.result()
                 except Exception:
-                    body, links, title, status = None, None, None, None
+                    result = FAILED
+                frontier.record(url, depth, result, len(futures_map))
+                if frontier.done():
+                    break
 
-                if body and status == 200:
-                    fpath = save_article(out_dir, title, url, body)
-                    saved += 1
-                    index.writerow([
-                        title or "",
-                        url,
-                        os.path.basename(fpath),
-                        os.path.getsize(fpath),
-                        status,
-                        depth,
-                        len(links or [])
-                    ])
-
-                    # Enqueue children if within depth and limit
-                    if depth < max_depth:
-                        for href in links or []:
-                            full = urljoin(WIKI_BASE, href)
-                            # Keep within enwiki host
-                            if urlparse(full).netloc != urlparse(WIKI_BASE).netloc:
-                                continue
-                            if full not in seen and saved + len(futures_map) < limit:
-                                seen.add(full)
-                                q.append((full, depth + 1))
+def start_parse_pool(parse_procs: int) -> ProcessPoolExecutor:
+    """
+    A pool of ``parse_procs`` parser processes, forked before this returns.
+    Call it before any fetch thread or event loop exists: a child forked
+    while another thread holds a lock (the import lock, urllib3's pool
+    lock) inherits it held and can deadlock.
+    """
+    pool = ProcessPoolExecutor(max_workers=parse_procs)
+    pool.submit(int).result()
+    return pool
+
+def crawl_staged(frontier: CrawlFrontier, session: PoliteSession, workers: int, parse_procs: int,
+                 extract=DEFAULT_EXTRACT, parse_pool: ProcessPoolExecutor = None):
+    """
+    Three-stage crawl: ``workers`` I/O threads fetch raw HTML, a pool of
+    ``parse_procs`` processes parses and cleans it, and this thread is the
+    single writer. At most ``2 * parse_procs`` pages wait for a parser;
+    fetching pauses while that backlog is full, so memory stays flat.
+    Without ``parse_pool`` (see start_parse_pool) one is started here,
+    before the I/O threads, and shut down at the end.
+    """
+    fetching = {}  # fetch future -> (url, depth)
+    parsing = {}   # parse future -> (url, depth)
+    backlog = 2 * parse_procs
+    parse_pool = start_parse_pool(parse_procs) if parse_pool is None else contextlib.nullcontext(parse_pool)
+    with parse_pool as parse_pool, ThreadPoolExecutor(max_workers=workers) as io_pool:
+        while not frontier.done():
+            if len(parsing) < backlog:
+                for url, depth in frontier.next_batch(len(fetching) + len(parsing),
+                                                      workers - len(fetching)):
+                    fetching[io_pool.submit(fetch_page, session, url)] = (url, depth)
+            if not fetching and not parsing:
+                break
+
+            done, _pending = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in fetching:
+                    url, depth = fetching.pop(fut)
+                    try:
+                        html, result = fut.result()
+                    except Exception:
+                        html, result = None, FAILED
+                    if html is not None:
+                        parsing[parse_pool.submit(extract, html)] = (url, depth)
+                        continue
                 else:
-                    index.writerow(["", url, "", 0, status or "ERR", depth, 0])
+                    url, depth = parsing.pop(fut)
+                    try:
+                        result = parsed_result(session, url, fut.result())
+                    except Exception:
+                        result = FAILED
+                frontier.record(url, depth, result, len(fetching) + len(parsing))
+                if frontier.done():
+                    break
+        for fut in list(fetching) + list(parsing):
+            fut.cancel()
 
-                if saved >= limit:
+def crawl_api(frontier: CrawlFrontier, session: PoliteSession, workers: int, api_url: str,
+              batch_size: int = MAX_TITLES):
+    """Like crawl_threads, but each worker fetches a batch of up to ``batch_size`` titles at once."""
+    futures_map = {}
+    in_flight = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while not frontier.done():
+            while len(futures_map) < workers:
+                batch = list(frontier.next_batch(in_flight, batch_size))
+                if not batch:
+                    break
+                in_flight += len(batch)
+                fut = executor.submit(scrape_batch, session, api_url, [url for url, _ in batch])
+                futures_map[fut] = batch
+            if not futures_map:
+                break
+
+            done, _pending = wait(list(futures_map), return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch = futures_map.pop(fut)
+                try:
+                    results = fut.result()
+                except Exception:
+                    results = {}
+                for url, depth in batch:
+                    in_flight -= 1
+                    frontier.record(url, depth, results.get(url, FAILED), in_flight)
+                    if frontier.done():
+                        break
+                if frontier.done():
+                    break
+
+async def crawl_async(frontier: CrawlFrontier, workers: int, delay: float, jitter: float,
+                      timeout: float, retries: int, limiter: HostLimiters, cache: HttpCache = None,
+                      extract=DEFAULT_EXTRACT, parse_procs: int = 0, parse_pool: ProcessPoolExecutor = None):
+    # Parsing in a process pool keeps the event loop free for I/O; the number
+    # of tasks (at most ``workers``) bounds how much HTML can queue up for it.
+    # Pass one from start_parse_pool(): aiohttp's resolver threads may already
+    # be running by now, so a pool started here is only a fallback.
+    own_pool = parse_pool is None and parse_procs > 0
+    if own_pool:
+        parse_pool = start_parse_pool(parse_procs)
+    session = AsyncPoliteSession(delay=delay, jitter=jitter, max_retries=retries, timeout=timeout,
+                                 limiter=limiter, max_parallel=workers, cache=cache,
+                                 metrics=frontier.metrics)
+    tasks = {}
+    try:
+        while not frontier.done():
+            for url, depth in frontier.next_batch(len(tasks), workers - len(tasks)):
+                task = scrape_single_async(session, url, extract, parse_pool)
+                tasks[asyncio.ensure_future(task)] = (url, depth)
+            if not tasks:
+                break
+
+            done, _pending = await asyncio.wait(list(tasks), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, depth = tasks.pop(task)
+                try:
+                    result = task.result()
+                except Exception:
+                    result = FAILED
+                frontier.record(url, depth, result, len(tasks))
+                if frontier.done():
                     break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await session.close()
+        if own_pool:
+            parse_pool.shutdown(cancel_futures=True)
+
+def crawl(start_topic: str, out_dir: str, limit: int, max_depth: int, workers: int,
+          delay: float, jitter: float, timeout: float, retries: int,
+          engine: str = "threads", base: str = WIKI_BASE, rps: float = None, burst: int = None,
+          resume: bool = False, cache_dir: str = None, cache_mb: int = 512, parser: str = "auto",
+          parse_procs: int = 0, dedup: str = "exact", bloom_capacity: int = 10_000_000,
+          spill: bool = False, output: str = "files", metrics: bool = False,
+          metrics_interval: float = 5.0, frontier: str = "bfs", topic_weight: float = 5.0,
+          source: str = "html", batch_size: int = MAX_TITLES, near_dup_bits: int = 3,
+          graph: bool = False, shard=None, coordinator_path: str = None, recrawl: int = None,
+          hosts=(), host_rps: dict = None, robots: bool = True):
+    """
+    Crawl and save up to ``limit`` articles.
+
+    Requests are paced by one shared token bucket: ``rps`` defaults to
+    ``workers / delay`` (each worker waiting ``delay`` between requests) and
+    ``burst`` to ``workers``. Progress is checkpointed to
+    ``crawl_state.sqlite``; with ``resume`` the crawl continues from it and
+    never refetches a completed URL. With ``cache_dir`` responses are cached
+    and revalidated with conditional GETs. ``parser`` picks the article
+    extractor backend (see utils/wiki_extract.py); with ``parse_procs`` > 0
+    parsing runs in that many processes instead of the fetching threads.
+    ``dedup``, ``bloom_capacity`` and ``spill`` control the compact URL
+    store (utils/url_store.py). ``output="segments"`` packs articles into
+    segment files instead of one .txt per page. Per-stage metrics are always
+    collected and returned in ``stats``; with ``metrics`` they are also
+    written to <out>/metrics.jsonl and <out>/metrics.prom every
+    ``metrics_interval`` seconds. ``frontier="best"`` fetches the most
+    linked-to, most on-topic articles first (``topic_weight`` trades the two
+    off) instead of crawling breadth-first. ``source="api"`` fetches wikitext
+    for ``batch_size`` titles per MediaWiki API request instead of one HTML
+    page per article (thread workers only; ``parser`` and ``parse_procs`` do
+    not apply). Redirects and near-duplicates (SimHash within
+    ``near_dup_bits`` bits and near-identical text; None keeps every page)
+    are not saved or expanded and point at the original in index.csv's
+    canonical_url column. With
+    ``graph`` the link graph is saved to <out>/graph. With ``shard=(i, N)``
+    this process crawls only the articles hashed to shard ``i``, into
+    <out>/shards/<i>-of-<N>, with ``limit`` split evenly between the shards;
+    links are exchanged through ``coordinator_path`` (default
+    <out>/coordinator.sqlite) and the last shard to finish writes the merged
+    <out>/index.csv. ``recrawl=budget`` instead revisits the saved pages of
+    an earlier crawl most likely to have changed since (utils/recrawl.py),
+    at most ``budget`` per day; ``limit`` and ``max_depth`` do not apply and
+    no new links are followed.
 
-    index_fp.close()
-    return saved, index_path
+    ``hosts`` adds further wikis to the crawl, as base URLs (started at
+    ``start_topic``) or article URLs to start from. Each host, ``base``
+    included, gets its own queue and its own ``rps``/``burst`` token bucket,
+    so the total rate grows with the number of hosts while each one sees
+    the rate of a single-host crawl. ``host_rps`` (netloc -> rps) and, with
+    ``robots``, each host's robots.txt Crawl-delay or Request-rate lower a
+    host's rate; robots.txt Disallow rules are obeyed too. Returns
+    ``(saved, index_path, stats)``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    coordinator = None
+    crawl_dir = out_dir
+    if shard is not None:
+        i, shards = shard
+        coordinator = ShardCoordinator(coordinator_path or os.path.join(out_dir, "coordinator.sqlite"), i, shards)
+        crawl_dir = os.path.join(out_dir, shard_dir_name(i, shards))
+        limit = limit // shards + (i < limit % shards)
+        os.makedirs(crawl_dir, exist_ok=True)
+
+    if rps is None:
+        rps = workers / delay if delay > 0 else float(workers * 1000)
+    limiter = HostLimiters(rate=rps, burst=burst or workers)
+    bases, seeds = [base], []
+    for host in hosts:
+        parts = urlsplit(host)
+        host_base = f"{parts.scheme}://{parts.netloc}"
+        bases.append(host_base)
+        if parts.path.startswith(ARTICLE_PREFIX):
+            seeds.append(host_base + parts.path)
+        else:
+            seeds.append(f"{host_base}{ARTICLE_PREFIX}{start_topic.replace(' ', '_')}")
+    host_robots = {}
+    for host_base in bases:
+        netloc = urlsplit(host_base).netloc
+        limits = [(host_rps or {}).get(netloc)]
+        if robots:
+            host_robots[netloc] = load_robots(host_base, timeout)
+            limits.append(robots_rps(host_robots[netloc]))
+        limits = [r for r in limits if r is not None]
+        if limits and min(limits) < rps:
+            limiter.set(netloc, min(limits), burst=1)
+    cache = HttpCache(cache_dir, max_bytes=cache_mb * 1024 * 1024) if cache_dir else None
+    extract = make_extract(parser)
+    crawl_metrics = CrawlMetrics(crawl_dir if metrics else None, interval=metrics_interval)
+
+    if recrawl is not None:
+        resume, frontier = True, "bfs"  # the plan is already in priority order
+
+    start_url = f"{base}{ARTICLE_PREFIX}{start_topic.replace(' ', '_')}"
+    frontier = CrawlFrontier(start_url, base, crawl_dir, limit, max_depth, resume=resume,
+                             dedup=dedup, bloom_capacity=bloom_capacity, spill=spill, output=output,
+                             metrics=crawl_metrics, frontier=frontier, topic_weight=topic_weight,
+                             near_dup_bits=near_dup_bits, graph=graph, coordinator=coordinator,
+                             hosts=bases[1:], seeds=seeds, robots=host_robots, workers=workers)
+    schedule = frontier.revisit(recrawl, time.time()) if recrawl is not None else None
+    session = None
+    if source == "api" or engine != "async":
+        session = PoliteSession(delay=delay, jitter=jitter, max_retries=retries, timeout=timeout,
+                                limiter=limiter, cache=cache, metrics=crawl_metrics, pool_size=workers)
+    index_path = frontier.index_path
+    # Forked once, before any fetch thread or event loop exists
+    parse_pool = start_parse_pool(parse_procs) if parse_procs > 0 and source != "api" else None
+    try:
+        while True:
+            if source == "api":
+                crawl_api(frontier, session, workers, base + API_PATH, batch_size)
+            elif engine == "async":
+                asyncio.run(crawl_async(frontier, workers, delay, jitter, timeout, retries, limiter, cache,
+                                        extract, parse_procs, parse_pool))
+            elif parse_procs > 0:
+                crawl_staged(frontier, session, workers, parse_procs, extract, parse_pool)
+            else:
+                crawl_threads(frontier, session, workers, extract)
+            # A shard that ran dry waits for links from the others before stopping
+            if coordinator is None or not frontier.wait_for_work():
+                break
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
+        frontier.close()
+        if coordinator is not None:
+            if coordinator.finished():
+                index_path = merge_shard_indexes(out_dir, shards)
+            coordinator.close()
+        if cache is not None:
+            cache.close()
+        if metrics:
+            crawl_metrics.snapshot()
+
+    stats = {"rps": limiter.measured_rps(), "metrics": crawl_metrics.to_dict()}
+    if len(bases) > 1:
+        stats["hosts"] = {
+            netloc: {"pages": frontier.host_pages.get(netloc, 0), "rps": host_limiter.measured_rps(),
+                     "rate_limit": host_limiter.rate}
+            for netloc, host_limiter in limiter.limiters.items()
+        }
+    if cache is not None:
+        stats["cache"] = cache.stats()
+    if coordinator is not None:
+        stats["shard_index"] = frontier.index_path
+    if schedule is not None:
+        stats["recrawl"] = {
+            "scheduled": len(schedule),
+            "changed": frontier.changed,
+            "failed": frontier.revisit_failures,
+            "expected_changed": sum(p_changed for _urgency, p_changed, *_ in schedule),
+        }
+    return frontier.saved, index_path, stats
+
+def ingest_dump(dump_path: str, out_dir: str, limit: int = None, procs: int = None,
+                index_path: str = None, base: str = WIKI_BASE, output: str = "files",
+                metrics: bool = False, metrics_interval: float = 5.0, graph: bool = False):
+    """
+    Build the same corpus as ``crawl`` from a local pages-articles XML dump,
+    without network access: one file (or segment record) per article and an
+    index.csv with the crawler's columns (depth is always 0). Streams are
+    decompressed and converted in ``procs`` processes (default: all cores);
+    see utils/wiki_dump.py. With ``graph`` the link graph is saved to
+    <out>/graph. Returns ``(saved, index_path, stats)``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    crawl_metrics = CrawlMetrics(out_dir if metrics else None, interval=metrics_interval)
+    segments = SegmentWriter(os.path.join(out_dir, "segments")) if output == "segments" else None
+    link_graph = LinkGraphWriter(os.path.join(out_dir, "graph")) if graph else None
+    index_csv = os.path.join(out_dir, "index.csv")
+    saved = 0
+    articles = iter_dump_articles(dump_path, procs, index_path)
+    with open(index_csv, "w", encoding="utf-8", newline="") as f:
+        index = csv.writer(f)
+        index.writerow(INDEX_HEADER)
+        try:
+            for title, body, links in articles:
+                if limit is not None and saved >= limit:
+                    break
+                t0 = time.perf_counter()
+                url = base + title_href(title)
+                if segments is not None:
+                    fname, _flushed = segments.append({"title": title, "url": url, "body": body})
+                    nbytes = len(body.encode("utf-8"))
+                else:
+                    fpath = save_article(out_dir, title, url, body)
+                    fname, nbytes = os.path.basename(fpath), os.path.getsize(fpath)
+                index.writerow([title, url, fname, nbytes, 200, 0, len(links), url])
+                if link_graph is not None:
+                    strip = len(ARTICLE_PREFIX)
+                    link_graph.add_page(title_href(title)[strip:], [href[strip:] for href in links])
+                saved += 1
+                crawl_metrics.observe("save", time.perf_counter() - t0)
+                crawl_metrics.page_done(True, 0)
+        finally:
+            articles.close()
+            if segments is not None:
+                segments.close()
+            if link_graph is not None:
+                link_graph.close()
+            if metrics:
+                crawl_metrics.snapshot()
+    return saved, index_csv, {"rps": 0.0, "metrics": crawl_metrics.to_dict()}
 
 # -------- CLI -------- #
 
@@ -220,25 +1312,144 @@ def main():
     parser = argparse.ArgumentParser(
         description="Polite, multi-threaded Wikipedia scraper for educational use."
     )
-    parser.add_argument("--topic", required=True, help='Start topic, e.g. "Machine learning"')
-    parser.add_argument("--out", default=None, help="Output directory (default: <topic>_wiki_articles)")
-    parser.add_argument("--limit", type=int, default=30, help="Max pages to save (default: 30)")
+    parser.add_argument("--topic", default=None, help='Start topic, e.g. "Machine learning"')
+    parser.add_argument("--from-dump", default=None, metavar="XML_BZ2",
+                        help="Build the corpus from a local pages-articles dump instead of crawling")
+    parser.add_argument("--dump-index", default=None, metavar="INDEX_BZ2",
+                        help="The dump's multistream index, to split streams without scanning")
+    parser.add_argument("--out", default=None,
+                        help="Output directory (default: <topic>_wiki_articles, or wiki_dump_articles)")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Max pages to save (default: 30; no limit with --from-dump)")
     parser.add_argument("--depth", type=int, default=1, help="Max crawl depth (default: 1)")
     parser.add_argument("--workers", type=int, default=4, help="Concurrent workers (default: 4)")
-    parser.add_argument("--delay", type=float, default=1.0, help="Base delay between requests (default: 1.0s)")
-    parser.add_argument("--jitter", type=float, default=0.5, help="Random jitter added to delay (default: 0.5s)")
+    parser.add_argument("--delay", type=float, default=1.0,
+                        help="Per-worker delay between requests; sets the default --rps "
+                             "to workers/delay and the base backoff (default: 1.0s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Random jitter added to backoff (default: 0.5s)")
+    parser.add_argument("--rps", type=float, default=None,
+                        help="Target requests per second to each host, across all workers "
+                             "(default: workers/delay)")
+    parser.add_argument("--burst", type=int, default=None,
+                        help="Token-bucket burst size (default: workers)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted crawl from <out>/crawl_state.sqlite")
+    parser.add_argument("--cache", default=None, metavar="DIR",
+                        help="Keep an HTTP cache in DIR and revalidate with conditional GETs")
+    parser.add_argument("--cache-mb", type=int, default=512, help="HTTP cache size bound (default: 512 MB)")
+    parser.add_argument("--source", choices=("html", "api"), default="html",
+                        help="html: download each article page; api: fetch wikitext for a batch of "
+                             "titles per MediaWiki API request (default: html)")
+    parser.add_argument("--batch-size", type=int, default=MAX_TITLES,
+                        help=f"Titles per API request for --source api (default/max: {MAX_TITLES})")
+    parser.add_argument("--parser", choices=("auto",) + tuple(BACKENDS), default="auto",
+                        help="Article extractor; auto uses lxml when installed (default: auto)")
+    parser.add_argument("--parse-procs", type=int, default=0,
+                        help="Parse pages in this many processes, fed through a bounded queue "
+                             "(0 = parse in the fetch workers, or use every core with --from-dump; "
+                             f"this machine has {os.cpu_count()} cores)")
+    parser.add_argument("--dedup", choices=("exact", "bloom"), default="exact",
+                        help="Seen-set: exact title set, or a fixed-size Bloom filter (default: exact)")
+    parser.add_argument("--bloom-capacity", type=int, default=10_000_000,
+                        help="Expected distinct URLs for --dedup bloom (default: 10M, ~18 MB)")
+    parser.add_argument("--spill", action="store_true",
+                        help="Spill full frontier chunks to <out>/.frontier instead of keeping them in memory")
+    parser.add_argument("--frontier", choices=("bfs", "best"), default="bfs",
+                        help="bfs: breadth-first (default, as crawl()); best: opt in to fetching the most "
+                             "linked-to and on-topic articles first")
+    parser.add_argument("--topic-weight", type=float, default=5.0,
+                        help="For --frontier best: score of a title containing every word of the "
+                             "topic, in in-links (default: 5)")
+    parser.add_argument("--near-dup-bits", type=int, default=3,
+                        help="Skip pages whose SimHash is within this many bits of a saved page "
+                             "and whose text is near-identical to it (default: 3)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Save redirects and near-duplicate pages like any other page")
+    parser.add_argument("--graph", action="store_true",
+                        help="Save the link graph to <out>/graph (CSR .npy arrays; rank it with "
+                             "python -m utils.link_graph <out>/graph)")
+    parser.add_argument("--output", choices=("files", "segments"), default="files",
+                        help="files: one .txt per article; segments: packed .jsonl.gz segments "
+                             "under <out>/segments, index.csv refers to them (default: files)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Write per-stage metrics to <out>/metrics.jsonl and <out>/metrics.prom")
+    parser.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="Seconds between metrics snapshots (default: 5)")
     parser.add_argument("--timeout", type=float, default=15.0, help="HTTP timeout seconds (default: 15)")
     parser.add_argument("--retries", type=int, default=3, help="Max retries on transient errors (default: 3)")
+    parser.add_argument("--engine", choices=("threads", "async"), default="threads",
+                        help="threads: one OS thread per worker; async: asyncio/aiohttp, "
+                             "suited to hundreds of workers (default: threads)")
+    parser.add_argument("--base-url", default=WIKI_BASE,
+                        help=f"Wiki host to crawl, e.g. a local stand-in (default: {WIKI_BASE})")
+    parser.add_argument("--hosts", nargs="+", default=[], metavar="URL",
+                        help="Also crawl these wikis, following links between all of them: base URLs "
+                             "(started at --topic) or article URLs to start from, e.g. "
+                             "https://de.wikipedia.org/wiki/Maschinelles_Lernen https://en.wiktionary.org")
+    parser.add_argument("--host-rps", nargs="+", default=[], metavar="HOST=RPS",
+                        help="Lower the request rate for single hosts, e.g. en.wiktionary.org=1")
+    parser.add_argument("--ignore-robots", action="store_true",
+                        help="Do not fetch robots.txt (by default its Disallow rules and "
+                             "Crawl-delay/Request-rate are obeyed per host)")
+    parser.add_argument("--recrawl", type=int, metavar="BUDGET",
+                        help="Refresh an earlier crawl in --out instead: revisit the saved articles most "
+                             "likely to have changed, at most BUDGET a day (no new links are followed)")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="Crawl shard I of N (0-based) into <out>/shards; run one process per "
+                             "shard with the same --topic, --out and --limit (the total)")
+    parser.add_argument("--coordinator", metavar="PATH",
+                        help="With --shard: SQLite file the shards exchange links through, on a "
+                             "filesystem all of them can reach (default: <out>/coordinator.sqlite)")
     args = parser.parse_args()
+    if args.from_dump:
+        out_dir = args.out or "wiki_dump_articles"
+        print(f"▶ Reading dump: {args.from_dump}")
+        print(f"   limit={args.limit}, procs={args.parse_procs or os.cpu_count()}, out_dir={out_dir}")
+        saved, index_path, _stats = ingest_dump(
+            args.from_dump, out_dir, limit=args.limit, procs=args.parse_procs or None,
+            index_path=args.dump_index, base=args.base_url.rstrip("/"), output=args.output,
+            metrics=args.metrics, metrics_interval=args.metrics_interval, graph=args.graph)
+        print(f"✅ Done. Saved {saved} article(s).")
+        print(f"📄 Index: {index_path}")
+        return
+    if not args.topic:
+        parser.error("--topic is required unless --from-dump is given")
+    if args.limit is None:
+        args.limit = 30
+    if args.frontier == "best" and args.spill:
+        parser.error("--spill needs --frontier bfs: the best-first frontier is kept in memory")
+    if args.source == "api" and args.engine == "async":
+        parser.error("--source api runs on the threads engine")
+    if not 1 <= args.batch_size <= MAX_TITLES:
+        parser.error(f"--batch-size must be between 1 and {MAX_TITLES}")
+    if args.coordinator and not args.shard:
+        parser.error("--coordinator needs --shard")
+    if args.recrawl is not None and args.shard:
+        parser.error("--recrawl works on one checkpoint; pass a shard's directory as --out")
+    if args.hosts and args.source == "api":
+        parser.error("--hosts needs --source html: API batches go to one host")
+    host_rps = {}
+    for item in args.host_rps:
+        host, _, rate = item.partition("=")
+        try:
+            host_rps[urlsplit(host).netloc or host] = float(rate)
+        except ValueError:
+            parser.error(f"--host-rps: expected HOST=RPS, got {item!r}")
 
     topic = args.topic.strip()
     out_dir = args.out or f"{topic.replace(' ', '_').lower()}_wiki_articles"
 
-    print(f"▶ Starting crawl from: {topic}")
-    print(f"   limit={args.limit}, depth={args.depth}, workers={args.workers}")
+    if args.recrawl is not None and not os.path.exists(os.path.join(out_dir, "crawl_state.sqlite")):
+        parser.error(f"--recrawl: no crawl checkpoint in {out_dir}")
+
+    print(f"▶ Starting {'recrawl' if args.recrawl is not None else 'crawl'} from: {topic}")
+    print(f"   limit={args.limit}, depth={args.depth}, workers={args.workers}, engine={args.engine}, "
+          f"frontier={args.frontier}")
     print(f"   out_dir={out_dir}")
+    if args.shard:
+        print(f"   shard={args.shard[0]}/{args.shard[1]}")
 
-    saved, index_path = crawl(
+    saved, index_path, stats = crawl(
         start_topic=topic,
         out_dir=out_dir,
         limit=args.limit,
@@ -248,9 +1459,63 @@ def main():
         jitter=args.jitter,
         timeout=args.timeout,
         retries=args.retries,
+        engine=args.engine,
+        base=args.base_url.rstrip("/"),
+        rps=args.rps,
+        burst=args.burst,
+        resume=args.resume,
+        cache_dir=args.cache,
+        cache_mb=args.cache_mb,
+        parser=args.parser,
+        parse_procs=args.parse_procs,
+        dedup=args.dedup,
+        bloom_capacity=args.bloom_capacity,
+        spill=args.spill,
+        output=args.output,
+        metrics=args.metrics,
+        metrics_interval=args.metrics_interval,
+        frontier=args.frontier,
+        topic_weight=args.topic_weight,
+        source=args.source,
+        batch_size=args.batch_size,
+        near_dup_bits=None if args.keep_duplicates else args.near_dup_bits,
+        graph=args.graph,
+        shard=args.shard,
+        coordinator_path=args.coordinator,
+        recrawl=args.recrawl,
+        hosts=[h.rstrip("/") for h in args.hosts],
+        host_rps=host_rps,
+        robots=not args.ignore_robots,
     )
 
-    print(f"✅ Done. Saved {saved} page(s).")
+    print(f"✅ Done. Saved {saved} page(s) at {stats['rps']:.2f} req/s.")
+    for netloc, h in stats.get("hosts", {}).items():
+        print(f"🌐 {netloc}: {h['pages']} page(s) at {h['rps']:.2f} req/s (limit {h['rate_limit']:.2f})")
+    if "recrawl" in stats:
+        r = stats["recrawl"]
+        print(f"🔁 Recrawl: revisited {r['scheduled']} page(s), {r['changed']} changed "
+              f"(expected {r['expected_changed']:.1f}), {r['failed']} failed and kept")
+    if stats["metrics"]["duplicates"]:
+        print(f"♻️  Skipped {stats['metrics']['duplicates']} redirect/near-duplicate page(s).")
+    if "cache" in stats:
+        c = stats["cache"]
+        print(f"🗄  Cache: {c['hits']} not-modified, {c['misses']} downloaded, {c['evictions']} evicted")
+    m = stats["metrics"]
+    if m["requests"]:
+        print(f"🔌 Connections: {m['connections_opened']} opened for {m['requests']} request(s) "
+              f"({m['connection_reuse']:.0%} reused); {m['wire_bytes_per_page'] / 1024:.1f} kB/page "
+              f"transferred, {m['bytes_per_page'] / 1024:.1f} kB/page decoded")
+    lat = m["latency"]
+    print("⏱  p50/p99 ms: " + ", ".join(
+        f"{stage} {lat[stage]['p50'] * 1000:.1f}/{lat[stage]['p99'] * 1000:.1f}" for stage in lat))
+    metrics_dir = os.path.dirname(stats.get("shard_index", os.path.join(out_dir, "index.csv")))
+    if args.metrics:
+        print(f"📈 Metrics: {os.path.join(metrics_dir, 'metrics.jsonl')}, {os.path.join(metrics_dir, 'metrics.prom')}")
+    if "shard_index" in stats:
+        print(f"🧩 Shard index: {stats['shard_index']}")
+        if index_path == stats["shard_index"]:
+            print(f"📄 Index: {os.path.join(out_dir, 'index.csv')} (written by the last shard to finish)")
+            return
     print(f"📄 Index: {index_path}")
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
 
+from utils.http_cache import HttpCache, cached_get
+
 # ---------- SETTINGS ----------
 START_TOPIC = "Machine learning"
 LIMIT = 10         # max number of pages to download
@@ -21,9 +23,11 @@ BAD_PREFIXES = (
 )
 DELAY = 1.0        # seconds between requests
 JITTER = 0.5       # random delay to be polite
+CACHE_DIR = "http_cache"  # conditional-GET cache shared across runs (None to disable)
 # ------------------------------
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+http_cache = HttpCache(CACHE_DIR) if CACHE_DIR else None
 
 def clean_text(text):
     text = re.sub(r"\[\d+\]", "", text)  # remove citations like [1]
@@ -45,7 +49,7 @@ def scrape_article(url):
     """Download and clean a single Wikipedia article."""
     try:
         time.sleep(DELAY + random.random() * JITTER)  # be polite
-        r = requests.get(url, timeout=15)
+        r = cached_get(requests, url, http_cache, timeout=15)
         if r.status_code != 200:
             return None, []
         soup = BeautifulSoup(r.text, "html.parser")
@@ -91,6 +95,9 @@ while queue and count < LIMIT:
                     queue.append((full_url, depth + 1))
 
 print("\n✅ Crawl finished!")
+if http_cache:
+    print(f"Cache: {http_cache.hits} not-modified, {http_cache.misses} downloaded")
+    http_cache.close()
 print(f"Saved {count} articles to '{OUTPUT_DIR}'")
 
 # Preview first article